@@ -0,0 +1,59 @@
+import os
+import random
+import tempfile
+import time
+
+from utils.file_handler import FileHandler
+from synthetic import synthetic_columns
+
+LOOKUPS = 200
+
+def _mean(durations):
+    return sum(durations) / len(durations) if durations else None
+
+def run(library_sizes, macro_events=1000):
+    """Measure favorites add/lookup/delete cost as the library grows."""
+    results = []
+    macro = synthetic_columns(macro_events)
+    rng = random.Random(0)
+    for library_size in library_sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            os.chdir(directory)
+            FileHandler._favorites_store = None
+            names = [f"macro {index}" for index in range(library_size)]
+
+            adds = []
+            for name in names:
+                start = time.perf_counter()
+                FileHandler.save_favorite(name, macro)
+                adds.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            FileHandler.favorite_names()
+            list_seconds = time.perf_counter() - start
+
+            lookups = []
+            for name in rng.choices(names, k=LOOKUPS):
+                start = time.perf_counter()
+                FileHandler.favorite_info(name)
+                FileHandler.load_favorite(name)
+                lookups.append(time.perf_counter() - start)
+
+            deletes = []
+            for name in rng.sample(names, max(1, library_size // 10)):
+                start = time.perf_counter()
+                FileHandler.delete_favorite(name)
+                deletes.append(time.perf_counter() - start)
+            os.chdir(tempfile.gettempdir())
+
+        results.append({
+            'library_size': library_size,
+            'macro_events': macro_events,
+            'add_mean_seconds': _mean(adds),
+            'add_last_seconds': adds[-1] if adds else None,
+            'list_seconds': list_seconds,
+            'lookup_mean_seconds': _mean(lookups),
+            'delete_mean_seconds': _mean(deletes),
+        })
+    FileHandler._favorites_store = None
+    return results
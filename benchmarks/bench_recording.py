@@ -0,0 +1,66 @@
+import time
+
+from pynput.keyboard import KeyCode
+from pynput.mouse import Button
+
+from ui.main_window import MacroRecorder
+from utils.recording_buffer import RecordingBuffer
+from utils.hotkeys import ChordMatcher
+from utils.recording_stats import RecordingStats
+from models.settings import Settings
+from synthetic import synthetic_columns
+
+class RecorderStub:
+    """Carries the attributes the MacroRecorder listener callbacks use, without a window."""
+
+    def __init__(self):
+        self.recording = True
+        self.settings = Settings()
+        self.recording_buffer = RecordingBuffer(
+            max_move_rate=self.settings.max_move_rate,
+            min_move_distance=self.settings.min_move_distance
+        )
+        self.click_exclusion_zones = ()
+        self.hotkeys = ChordMatcher()
+        self.recording_stats = RecordingStats()
+        self.settings_dialog = None
+
+def _measure(calls, callback, args):
+    start = time.perf_counter()
+    for item in args:
+        callback(*item)
+    elapsed = time.perf_counter() - start
+    return {
+        'calls': calls,
+        'seconds': elapsed,
+        'calls_per_second': calls / elapsed if elapsed else None,
+        'ns_per_call': elapsed / calls * 1e9 if calls else None,
+    }
+
+def run(sizes):
+    """Drive the recorder's listener callbacks directly with synthetic input."""
+    results = []
+    for size in sizes:
+        columns = synthetic_columns(size)
+        recorder = RecorderStub()
+        moves = _measure(size, lambda x, y: MacroRecorder.on_move(recorder, x, y),
+                         zip(columns.x, columns.y))
+
+        keys = [KeyCode.from_char(chr(ord('a') + index % 26)) for index in range(size // 2)]
+        press = lambda key: MacroRecorder.on_key_press(recorder, key)
+        release = lambda key: MacroRecorder.on_key_release(recorder, key)
+        key_events = _measure(len(keys) * 2, lambda key: (press(key), release(key)),
+                              ((key,) for key in keys))
+
+        clicks = _measure(size, lambda x, y, pressed: MacroRecorder.on_click(recorder, x, y, Button.left, pressed),
+                          ((x, y, index % 2 == 0) for index, (x, y) in enumerate(zip(columns.x, columns.y))))
+
+        results.append({
+            'events': size,
+            'on_move': moves,
+            'on_key_press_release': key_events,
+            'on_click': clicks,
+            'moves_stored': recorder.recording_buffer.type.count(0),
+            'events_stored': len(recorder.recording_buffer),
+        })
+    return results
@@ -0,0 +1,35 @@
+import time
+
+from utils.replay_plan import compile_plan
+from utils.replay_thread import ReplayThread
+from utils.replay_backends import NullBackend
+from synthetic import synthetic_columns
+
+def run(sizes, interval=0.001):
+    """Replay synthetic macros in real time on the null backend."""
+    results = []
+    for size in sizes:
+        backend = NullBackend()
+        plan = compile_plan(synthetic_columns(size, interval), backend)
+        thread = ReplayThread(plan, backend)
+
+        start = time.perf_counter()
+        # Run in this thread, the benchmark does not need a Qt event loop
+        thread.run()
+        wall_seconds = time.perf_counter() - start
+
+        scheduler = thread.scheduler
+        results.append({
+            'events': size,
+            'operations': len(plan),
+            'interval_seconds': interval,
+            'plan_seconds': plan.duration,
+            'wall_seconds': wall_seconds,
+            'mean_lateness_ms': scheduler.total_lateness / scheduler.events * 1000 if scheduler.events else None,
+            'max_lateness_ms': scheduler.max_lateness * 1000,
+            'drift_ms': scheduler.last_lateness * 1000,
+            'backend_calls': backend.calls,
+            'backend_flushes': backend.flushes,
+            'timing': thread.timing.stats(),
+        })
+    return results
@@ -0,0 +1,34 @@
+import os
+import time
+
+from utils import macro_codec
+from utils.file_handler import FileHandler
+from synthetic import synthetic_columns
+
+def run(sizes):
+    """Measure FileHandler save/load time and file size of the current macro."""
+    results = []
+    for size in sizes:
+        columns = synthetic_columns(size)
+
+        start = time.perf_counter()
+        FileHandler.save_macro(columns)
+        save_seconds = time.perf_counter() - start
+        file_size = os.path.getsize(FileHandler.MACRO_FILE)
+
+        start = time.perf_counter()
+        loaded = FileHandler.load_macro_columns()
+        load_seconds = time.perf_counter() - start
+        if len(loaded) != size:
+            raise RuntimeError(f"Loaded {len(loaded)} of {size} events")
+
+        results.append({
+            'events': size,
+            'save_seconds': save_seconds,
+            'load_seconds': load_seconds,
+            'bytes': file_size,
+            'bytes_per_event': file_size / size if size else None,
+            'format_version': macro_codec.VERSION,
+        })
+        os.remove(FileHandler.MACRO_FILE)
+    return results
@@ -0,0 +1,86 @@
+"""Benchmark the record -> store -> replay pipeline with synthetic macros.
+
+Usage:
+    python benchmarks/run.py [--quick] [--only storage replay] [--output results.json]
+
+Results are written as JSON so runs of different versions can be compared.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+SIZES = [1000, 10000, 100000, 1000000, 10000000]
+QUICK_SIZES = [1000, 10000, 100000]
+# Callback and replay benchmarks run in real time, so they stop at smaller sizes
+RECORDING_MAX = 1000000
+REPLAY_SIZES = [1000, 10000]
+LIBRARY_SIZES = [10, 100, 1000]
+BENCHMARKS = ('recording', 'storage', 'favorites', 'replay')
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmark(name, sizes):
+    if name == 'recording':
+        import bench_recording
+        return bench_recording.run([size for size in sizes if size <= RECORDING_MAX])
+    if name == 'storage':
+        import bench_storage
+        return bench_storage.run(sizes)
+    if name == 'favorites':
+        import bench_favorites
+        return bench_favorites.run(LIBRARY_SIZES)
+    import bench_replay
+    return bench_replay.run([size for size in REPLAY_SIZES if size <= max(sizes)])
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the TinyTask macro pipeline")
+    parser.add_argument('--sizes', type=int, nargs='+', help="macro sizes in events")
+    parser.add_argument('--quick', action='store_true', help="only run sizes up to 100k events")
+    parser.add_argument('--only', nargs='+', choices=BENCHMARKS, help="benchmarks to run")
+    parser.add_argument('--output', default='benchmark-results.json', help="JSON file to write")
+    args = parser.parse_args()
+
+    sizes = args.sizes or (QUICK_SIZES if args.quick else SIZES)
+    output = os.path.abspath(args.output)
+    results = {
+        'meta': {
+            'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'sizes': sizes,
+        },
+    }
+
+    # FileHandler works relative to the current directory
+    with tempfile.TemporaryDirectory() as directory:
+        cwd = os.getcwd()
+        os.chdir(directory)
+        try:
+            for name in args.only or BENCHMARKS:
+                print(f"Running {name} benchmark...")
+                results[name] = run_benchmark(name, sizes)
+                os.chdir(directory)
+        finally:
+            os.chdir(cwd)
+
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+if __name__ == "__main__":
+    main()
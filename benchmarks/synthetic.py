@@ -0,0 +1,46 @@
+import array
+import random
+
+from utils import macro_codec
+from utils.macro_codec import MacroColumns
+
+BLOCK_SIZE = 4096
+KEYS = ['Button.left', 'Button.right'] + list('abcdefghijklmnopqrstuvwxyz') + ['Key.space', 'Key.enter']
+
+def _event_block(seed):
+    """Build one block of realistic event columns: mostly moves, some clicks, scrolls and typing."""
+    rng = random.Random(seed)
+    block = MacroColumns(KEYS)
+    x, y = 500, 500
+    while len(block) < BLOCK_SIZE:
+        roll = rng.random()
+        if roll < 0.85:
+            x = max(0, min(1919, x + rng.randint(-12, 12)))
+            y = max(0, min(1079, y + rng.randint(-12, 12)))
+            block.append(macro_codec.MOVE, 0.0, x, y)
+        elif roll < 0.90:
+            button = rng.randint(0, 1)
+            block.append(macro_codec.CLICK, 0.0, x, y, key=button, pressed=1)
+            block.append(macro_codec.CLICK, 0.0, x, y, key=button, pressed=0)
+        elif roll < 0.93:
+            block.append(macro_codec.SCROLL, 0.0, x, y, 0, rng.choice((-1, 1)))
+        else:
+            key = rng.randint(2, len(KEYS) - 1)
+            block.append(macro_codec.KEY_PRESS, 0.0, key=key)
+            block.append(macro_codec.KEY_RELEASE, 0.0, key=key)
+    return block
+
+def synthetic_columns(count, interval=0.008, seed=0):
+    """Return a synthetic macro of ``count`` events spaced ``interval`` seconds apart.
+
+    One block of events is generated and tiled, so even 10M event macros are
+    built in about a second.
+    """
+    block = _event_block(seed)
+    repeats, remainder = divmod(count, len(block))
+    columns = MacroColumns(KEYS)
+    columns.time = array.array('d', (index * interval for index in range(count)))
+    for name, _ in MacroColumns.COLUMNS[1:]:
+        column = getattr(block, name)
+        setattr(columns, name, column * repeats + column[:remainder])
+    return columns
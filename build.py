@@ -2,10 +2,25 @@
 import os
 import sys
 import shutil
+import argparse
 import platform
+import statistics
 import subprocess
+import tempfile
+import time
 from pathlib import Path
 
+# Modules TinyTask never imports, left out of fast-launch builds so the bundle
+# holds only the Qt libraries the app loads
+FAST_EXCLUDES = [
+    'PyQt6.QtNetwork', 'PyQt6.QtQml', 'PyQt6.QtQuick', 'PyQt6.QtQuickWidgets',
+    'PyQt6.QtWebEngineCore', 'PyQt6.QtWebEngineWidgets', 'PyQt6.QtMultimedia',
+    'PyQt6.QtMultimediaWidgets', 'PyQt6.QtSql', 'PyQt6.QtTest', 'PyQt6.QtPdf',
+    'PyQt6.QtOpenGL', 'PyQt6.QtOpenGLWidgets', 'PyQt6.QtBluetooth', 'PyQt6.QtPositioning',
+    'PyQt6.QtSerialPort', 'PyQt6.QtDesigner', 'PyQt6.QtHelp', 'PyQt6.QtPrintSupport',
+    'tkinter', 'unittest', 'pydoc', 'doctest',
+]
+
 def get_platform():
     if sys.platform.startswith('win'):
         return 'windows'
@@ -24,16 +39,38 @@ def clean_build_dirs():
     for spec_file in Path('.').glob('*.spec'):
         spec_file.unlink()
 
-def build_portable():
-    """Build portable version"""
+def portable_target(platform_name, fast=False):
+    """Name of the portable build: a single file, or a folder for fast-launch builds"""
+    if fast:
+        return f'TinyTask-fast-{platform_name}'
+    if platform_name == 'windows':
+        return 'TinyTask-portable-windows.exe'
+    return 'TinyTask-portable-linux'
+
+def build_portable(fast=False, runtime_tmpdir=None):
+    """Build portable version
+    
+    The default build is a single executable, which unpacks the Python
+    runtime and Qt to a temporary folder on every launch. A fast-launch build
+    is a folder that starts without unpacking anything, leaves out unused Qt
+    modules and is compiled with docstrings and asserts stripped.
+    """
     platform_name = get_platform()
     clean_build_dirs()
     
     # Build command with all options
-    cmd = [
-        'pyinstaller',
+    if fast:
+        cmd = [sys.executable, '-OO', '-m', 'PyInstaller', '--onedir', '--noupx']
+        cmd += [f'--exclude-module={module}' for module in FAST_EXCLUDES]
+        if platform_name == 'linux':
+            cmd.append('--strip')
+    else:
+        cmd = ['pyinstaller', '--onefile']
+        if runtime_tmpdir:
+            # Unpack somewhere faster than the default temp folder, e.g. /dev/shm
+            cmd.append(f'--runtime-tmpdir={runtime_tmpdir}')
+    cmd += [
         '--clean',
-        '--onefile',
         '--windowed',
         '--name=TinyTask',
         f'--icon=icon.svg',
@@ -48,13 +85,12 @@ def build_portable():
     # Run PyInstaller
     subprocess.run(cmd, check=True)
     
-    # Rename the output file based on platform
-    source_file = 'dist/TinyTask'
-    if platform_name == 'windows':
-        source_file += '.exe'
-        target_file = 'TinyTask-portable-windows.exe'
+    # Rename the output based on platform
+    if fast:
+        source_file = 'dist/TinyTask'
     else:
-        target_file = 'TinyTask-portable-linux'
+        source_file = 'dist/TinyTask.exe' if platform_name == 'windows' else 'dist/TinyTask'
+    target_file = portable_target(platform_name, fast)
     
     # Remove target file if it exists
     if os.path.exists(target_file):
@@ -64,19 +100,29 @@ def build_portable():
             os.remove(target_file)
     
     shutil.move(source_file, target_file)
-    print(f"Created portable executable: {target_file}")
+    if fast:
+        print(f"Created fast-launch folder: {target_file}")
+    else:
+        print(f"Created portable executable: {target_file}")
     
     # Make the Linux binary executable
     if platform_name == 'linux':
-        os.chmod(target_file, 0o755)
+        os.chmod(app_executable(target_file, platform_name), 0o755)
     
     # Clean up build directories
     clean_build_dirs()
+    return target_file
+
+def app_executable(target, platform_name):
+    """Path of the executable in a portable build"""
+    if not os.path.isdir(target):
+        return target
+    return os.path.join(target, 'TinyTask.exe' if platform_name == 'windows' else 'TinyTask')
 
 def create_windows_installer():
     """Create Windows installer using NSIS"""
-    # First build the portable executable
-    build_portable()
+    # Installed copies use the fast-launch folder, they don't need to be a single file
+    bundle = build_portable(fast=True)
     
     # Create NSIS script
     nsis_script = '''
@@ -108,8 +154,7 @@ def create_windows_installer():
         SetOutPath "$INSTDIR"
         SetOverwrite on
         
-        File "TinyTask-portable-windows.exe"
-        Rename "$INSTDIR\\TinyTask-portable-windows.exe" "$INSTDIR\\TinyTask.exe"
+        File /r "%s\\*.*"
         
         CreateDirectory "$SMPROGRAMS\\TinyTask"
         CreateShortCut "$SMPROGRAMS\\TinyTask\\TinyTask.lnk" "$INSTDIR\\TinyTask.exe"
@@ -124,11 +169,12 @@ def create_windows_installer():
         WriteRegStr HKLM "Software\\Microsoft\\Windows\\CurrentVersion\\Uninstall\\TinyTask" "Publisher" "Ali Eren Altındağ"
         
         ${GetSize} "$INSTDIR" "/S=0K" $0 $1 $2
-        IntFmt $0 "0x%08X" $0
+        IntFmt $0 "0x%%08X" $0
         WriteRegDWORD HKLM "Software\\Microsoft\\Windows\\CurrentVersion\\Uninstall\\TinyTask" "EstimatedSize" "$0"
     SectionEnd
     
     Section "Uninstall"
+        RMDir /r "$INSTDIR\\_internal"
         Delete "$INSTDIR\\TinyTask.exe"
         Delete "$INSTDIR\\uninstall.exe"
         
@@ -140,7 +186,7 @@ def create_windows_installer():
         
         DeleteRegKey HKLM "Software\\Microsoft\\Windows\\CurrentVersion\\Uninstall\\TinyTask"
     SectionEnd
-    '''
+    ''' % bundle
     
     with open('installer.nsi', 'w') as f:
         f.write(nsis_script)
@@ -151,8 +197,8 @@ def create_windows_installer():
 
 def create_linux_installer():
     """Create Linux .deb package"""
-    # First build the portable executable
-    build_portable()
+    # Installed copies use the fast-launch folder, they don't need to be a single file
+    bundle = build_portable(fast=True)
     
     # Setup .deb package structure
     package_name = "tinytask"
@@ -164,6 +210,7 @@ def create_linux_installer():
     package_root = f"{package_name}_{version}_{arch}"
     os.makedirs(f"{package_root}/DEBIAN", exist_ok=True)
     os.makedirs(f"{package_root}/usr/local/bin", exist_ok=True)
+    os.makedirs(f"{package_root}/usr/local/lib", exist_ok=True)
     os.makedirs(f"{package_root}/usr/share/applications", exist_ok=True)
     os.makedirs(f"{package_root}/usr/share/icons/hicolor/scalable/apps", exist_ok=True)
     
@@ -182,9 +229,13 @@ Section: utils
     with open(f"{package_root}/DEBIAN/control", 'w') as f:
         f.write(control_content)
     
-    # Copy executable
-    shutil.copy2("TinyTask-portable-linux", f"{package_root}/usr/local/bin/tinytask")
-    os.chmod(f"{package_root}/usr/local/bin/tinytask", 0o755)
+    # Copy the application folder and link its executable into the path
+    if os.path.exists(f"{package_root}/usr/local/lib/tinytask"):
+        shutil.rmtree(f"{package_root}/usr/local/lib/tinytask")
+    shutil.copytree(bundle, f"{package_root}/usr/local/lib/tinytask", symlinks=True)
+    if os.path.lexists(f"{package_root}/usr/local/bin/tinytask"):
+        os.remove(f"{package_root}/usr/local/bin/tinytask")
+    os.symlink("../lib/tinytask/TinyTask", f"{package_root}/usr/local/bin/tinytask")
     
     # Copy icon
     shutil.copy2("icon.svg", f"{package_root}/usr/share/icons/hicolor/scalable/apps/tinytask.svg")
@@ -227,23 +278,84 @@ def build_installer():
             print("Please install dpkg-deb (sudo apt-get install dpkg)")
             sys.exit(1)
 
-def main():
-    if len(sys.argv) < 2:
-        print("Usage: python build.py [portable|installer|all]")
-        sys.exit(1)
+def measure_startup(command, runs):
+    """Launch the app ``runs`` times and return (seconds to exit, ms to first paint) per run
+    
+    TINYTASK_STARTUP_REPORT=exit makes the app write its startup report and
+    quit as soon as its window has been painted. The report is read from the
+    file named by TINYTASK_STARTUP_REPORT_FILE, since windowed builds have no
+    stderr to print it to.
+    """
+    report_fd, report_path = tempfile.mkstemp(suffix='.txt', prefix='tinytask-startup-')
+    os.close(report_fd)
+    env = dict(os.environ, TINYTASK_STARTUP_REPORT='exit', TINYTASK_STARTUP_REPORT_FILE=report_path)
+    results = []
+    try:
+        for _ in range(runs):
+            os.truncate(report_path, 0)
+            start = time.perf_counter()
+            result = subprocess.run(command, env=env, capture_output=True, text=True)
+            elapsed = time.perf_counter() - start
+            first_paint = None
+            with open(report_path) as f:
+                for line in f.read().splitlines():
+                    if line.startswith('startup:') and line.endswith('First paint'):
+                        first_paint = float(line.split()[1])
+            if result.returncode != 0 or first_paint is None:
+                print(f"Error launching {' '.join(command)}: {result.stderr.strip()}")
+                return None
+            results.append((elapsed, first_paint))
+    finally:
+        os.remove(report_path)
+    return results
+
+def compare_startup(runs=5, build=True, runtime_tmpdir=None):
+    """Compare the time to first window of the source tree and both build modes"""
+    platform_name = get_platform()
+    if build:
+        build_portable(runtime_tmpdir=runtime_tmpdir)
+        build_portable(fast=True)
     
-    build_type = sys.argv[1].lower()
+    modes = [('source', [sys.executable, 'src/main.py'])]
+    for name, fast in (('onefile', False), ('fast', True)):
+        target = portable_target(platform_name, fast)
+        if os.path.exists(target):
+            modes.append((name, [os.path.abspath(app_executable(target, platform_name))]))
+        else:
+            print(f"Skipping {name}: {target} not built")
+    
+    print(f"{'mode':<10}{'launch to exit (median)':>26}{'min':>10}{'first paint in app':>22}")
+    for name, command in modes:
+        results = measure_startup(command, runs)
+        if not results:
+            continue
+        totals = [elapsed * 1000 for elapsed, _ in results]
+        paints = [first_paint for _, first_paint in results]
+        print(f"{name:<10}{statistics.median(totals):>23.0f} ms{min(totals):>7.0f} ms"
+              f"{statistics.median(paints):>19.0f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Build TinyTask executables and installers")
+    parser.add_argument('build_type', choices=['portable', 'installer', 'all', 'startup'],
+                        type=str.lower, help="what to build; 'startup' compares launch times")
+    parser.add_argument('--fast', action='store_true',
+                        help="build a fast-launch folder instead of a single executable")
+    parser.add_argument('--runtime-tmpdir',
+                        help="where single-file builds unpack at launch, e.g. /dev/shm")
+    parser.add_argument('--runs', type=int, default=5, help="launches per mode for 'startup'")
+    parser.add_argument('--no-build', action='store_true',
+                        help="compare the existing builds for 'startup' without rebuilding")
+    args = parser.parse_args()
     
-    if build_type == 'portable':
-        build_portable()
-    elif build_type == 'installer':
+    if args.build_type == 'portable':
+        build_portable(args.fast, args.runtime_tmpdir)
+    elif args.build_type == 'installer':
         build_installer()
-    elif build_type == 'all':
-        build_portable()
+    elif args.build_type == 'all':
+        build_portable(args.fast, args.runtime_tmpdir)
         build_installer()
     else:
-        print("Invalid build type. Use: portable, installer, or all")
-        sys.exit(1)
+        compare_startup(args.runs, not args.no_build, args.runtime_tmpdir)
 
 if __name__ == '__main__':
     main() 
\ No newline at end of file
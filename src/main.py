@@ -1,11 +1,17 @@
 import sys
+from utils.startup_timer import startup_timer
 from PyQt6.QtWidgets import QApplication
+startup_timer.mark("Import Qt")
 from ui.main_window import MacroRecorder
+startup_timer.mark("Import main window")
 
 def main():
     app = QApplication(sys.argv)
+    startup_timer.mark("Create application")
     window = MacroRecorder()
+    startup_timer.mark("Build main window")
     window.show()
+    startup_timer.mark("Show main window")
     sys.exit(app.exec())
 
 if __name__ == "__main__":
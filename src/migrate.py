@@ -0,0 +1,262 @@
+"""Convert macro libraries to the current binary macro format in bulk.
+
+Usage:
+    python -m src.migrate [ROOT ...] [--jobs N] [--dry-run] [--remove-legacy]
+
+Every directory under the ROOTs that holds a TinyTask library (macro.json,
+favorite_macros.json, or binary macros in an older format) is converted in
+a process pool, one library per task, so no process holds more than one
+library at a time. Each converted macro is decoded again and compared with
+the original before the next one is written. JSON macros with events that
+cannot be converted unchanged are reported, and their JSON files are kept
+even with --remove-legacy.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils import macro_codec
+from utils.file_handler import FileHandler
+from utils.favorites_store import FavoritesStore, write_atomic
+
+# Decoded times may differ by rounding to whole nanoseconds
+TIME_TOLERANCE = 1e-9
+
+# Fields of each JSON action type that a converted event keeps
+ACTION_FIELDS = {
+    'move': ('x', 'y'),
+    'click': ('x', 'y', 'button', 'pressed'),
+    'scroll': ('x', 'y', 'dx', 'dy'),
+    'key_press': ('key',),
+    'key_release': ('key',),
+}
+
+def same_columns(original, converted):
+    """Return True if ``converted`` holds the same events as ``original``."""
+    if len(original) != len(converted):
+        return False
+    if original.keys != converted.keys:
+        return False
+    for name, _ in macro_codec.MacroColumns.COLUMNS[1:]:
+        if getattr(original, name) != getattr(converted, name):
+            return False
+    return all(abs(a - b) <= TIME_TOLERANCE for a, b in zip(original.time, converted.time))
+
+def changed_actions(actions, converted):
+    """Return how many JSON actions ``converted`` drops or does not hold unchanged."""
+    changed = 0
+    index = 0
+    for action in actions:
+        fields = ACTION_FIELDS.get(action.get('type'))
+        if fields is None:
+            # Unknown event types are dropped
+            changed += 1
+            continue
+        event = converted.action(index)
+        index += 1
+        for field in fields:
+            original = action.get(field, None if field in ('button', 'key') else 0)
+            if field == 'pressed':
+                original = bool(original)
+            if event[field] != original:
+                changed += 1
+                break
+        else:
+            if abs(event['time'] - float(action.get('time', 0))) > TIME_TOLERANCE:
+                changed += 1
+    return changed
+
+def format_version(path):
+    """Return the binary format version of a macro file, or None for JSON."""
+    with open(path, 'rb') as f:
+        if not macro_codec.is_binary(f.read(len(macro_codec.MAGIC))):
+            return None
+        f.seek(0)
+        return macro_codec.read_header(f)[0]
+
+def find_libraries(roots):
+    """Yield every directory under ``roots`` that holds a macro library."""
+    markers = (FileHandler.LEGACY_MACRO_FILE, FileHandler.MACRO_FILE,
+               FileHandler.FAVORITES_FILE, FileHandler.FAVORITES_DIR)
+    for root in roots:
+        for directory, subdirs, files in os.walk(root):
+            if any(marker in files or marker in subdirs for marker in markers):
+                yield directory
+            # Favorites are migrated with the library that holds them
+            if FileHandler.FAVORITES_DIR in subdirs:
+                subdirs.remove(FileHandler.FAVORITES_DIR)
+
+class LibraryResult:
+    """What migrating one library did."""
+
+    def __init__(self, path):
+        self.path = path
+        self.macros = 0
+        self.events = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.errors = []
+        # Macros converted with events dropped or changed; their JSON files are kept
+        self.warnings = []
+
+    def add(self, columns, bytes_in, bytes_out):
+        self.macros += 1
+        self.events += len(columns)
+        self.bytes_in += bytes_in
+        self.bytes_out += bytes_out
+
+def convert(columns, result, label, bytes_in, actions=None):
+    """Encode columns in the current format and check they decode to the same events.
+
+    For a JSON macro, ``actions`` are the original actions; events the
+    conversion dropped or changed are recorded as a warning.
+    Returns the encoded bytes, or None after recording an error.
+    """
+    data = macro_codec.encode(columns)
+    converted = macro_codec.decode(data)
+    if not same_columns(columns, converted):
+        result.errors.append(f"{label}: converted macro differs from the original")
+        return None
+    if actions is not None:
+        changed = changed_actions(actions, converted)
+        if changed:
+            result.warnings.append(f"{label}: {changed} of {len(actions)} events were dropped "
+                                   f"or changed, keeping the JSON file")
+    result.add(columns, bytes_in, len(data))
+    return data
+
+def migrate_macro(directory, result, dry_run, remove_legacy):
+    """Convert the library's current macro."""
+    path = os.path.join(directory, FileHandler.MACRO_FILE)
+    legacy_path = os.path.join(directory, FileHandler.LEGACY_MACRO_FILE)
+    if os.path.exists(path):
+        if format_version(path) == macro_codec.VERSION:
+            return
+        source = path
+    elif os.path.exists(legacy_path):
+        source = legacy_path
+    else:
+        return
+
+    with open(source, 'rb') as f:
+        raw = f.read()
+    warnings = len(result.warnings)
+    if macro_codec.is_binary(raw):
+        data = convert(macro_codec.decode(raw), result, source, len(raw))
+    else:
+        actions = json.loads(raw)
+        data = convert(macro_codec.MacroColumns.from_actions(actions), result, source, len(raw), actions)
+    if data is None or dry_run:
+        return
+    write_atomic(path, data)
+    if remove_legacy and source == legacy_path and len(result.warnings) == warnings:
+        os.remove(legacy_path)
+
+def migrate_favorites(directory, result, dry_run, remove_legacy):
+    """Convert the library's favorites to the per-macro store in the current format."""
+    root = os.path.join(directory, FileHandler.FAVORITES_DIR)
+    legacy_path = os.path.join(directory, FileHandler.FAVORITES_FILE)
+    store = FavoritesStore(root)
+    if os.path.exists(store.manifest_path):
+        # Already a store, only rewrite entries in an older binary format
+        for name in store.names():
+            entry_path = store.path(name)
+            if format_version(entry_path) == macro_codec.VERSION:
+                continue
+            columns = store.load(name)
+            data = convert(columns, result, f"{entry_path} ({name})", os.path.getsize(entry_path))
+            if data is not None and not dry_run:
+                store.save(name, columns)
+        return
+    if not os.path.exists(legacy_path):
+        return
+
+    with open(legacy_path, 'rb') as f:
+        raw = f.read()
+    legacy = json.loads(raw)
+    result.bytes_in += len(raw)
+    originals = {}
+    for name, actions in legacy.items():
+        columns = macro_codec.MacroColumns.from_actions(actions)
+        if convert(columns, result, f"{legacy_path} ({name})", 0, actions) is not None:
+            originals[name] = columns
+    if dry_run or len(originals) != len(legacy):
+        return
+
+    store = FavoritesStore(root, legacy_path)
+    for name in store.names():
+        if not same_columns(originals[name], store.load(name)):
+            result.errors.append(f"{legacy_path} ({name}): stored favorite differs from the original")
+    if remove_legacy and not result.errors and not result.warnings:
+        os.remove(legacy_path)
+
+def migrate_library(directory, dry_run=False, remove_legacy=False):
+    """Migrate one library; runs in a worker process."""
+    result = LibraryResult(directory)
+    for migrate in (migrate_macro, migrate_favorites):
+        try:
+            migrate(directory, result, dry_run, remove_legacy)
+        except Exception as e:
+            # A malformed library must not stop the others
+            result.errors.append(f"{directory}: {type(e).__name__}: {str(e)}")
+    return result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m src.migrate',
+                                     description="Convert TinyTask macro libraries to the current format")
+    parser.add_argument('roots', nargs='*', default=['.'], help="directories to search for libraries")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument('--dry-run', action='store_true', help="convert and verify without writing")
+    parser.add_argument('--remove-legacy', action='store_true',
+                        help="delete the JSON files once their macros are converted")
+    args = parser.parse_args(argv)
+
+    libraries = list(find_libraries(args.roots))
+    if not libraries:
+        print("No macro libraries found")
+        return 0
+
+    totals = LibraryResult(None)
+    failed = 0
+    warned = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        futures = {executor.submit(migrate_library, directory, args.dry_run, args.remove_legacy): directory
+                   for directory in libraries}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"Error: {futures[future]}: {type(e).__name__}: {str(e)}")
+                continue
+            totals.macros += result.macros
+            totals.events += result.events
+            totals.bytes_in += result.bytes_in
+            totals.bytes_out += result.bytes_out
+            if result.errors:
+                failed += 1
+                for error in result.errors:
+                    print(f"Error: {error}")
+            if result.warnings:
+                warned += 1
+                for warning in result.warnings:
+                    print(f"Warning: {warning}")
+    seconds = time.perf_counter() - start
+
+    print(f"{'Checked' if args.dry_run else 'Migrated'} {len(libraries)} libraries "
+          f"({failed} with errors, {warned} with warnings): {totals.macros} macros, {totals.events} events")
+    if totals.bytes_in:
+        print(f"Size: {totals.bytes_in / 1e6:.2f} MB -> {totals.bytes_out / 1e6:.2f} MB "
+              f"({totals.bytes_out / totals.bytes_in * 100:.0f}%)")
+    print(f"Time: {seconds:.2f} s, {len(libraries) / seconds:.1f} libraries/s, "
+          f"{totals.events / seconds:,.0f} events/s, {totals.bytes_in / 1e6 / seconds:.2f} MB/s")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,8 +6,20 @@ class Settings:
         self.track_mouse = True
         self.track_keyboard = True
         self.track_scroll = True
+        self.ignore_app_clicks = False
         self.record_key = 'ctrl+s'
         self.replay_key = 'ctrl+r'
+        self.max_move_rate = 60
+        self.min_move_distance = 3
+        self.simplify_tolerance = 2.0
+        self.optimize_on_save = True
+        self.replay_speed = 1.0
+        self.idle_gap_cap = 0
+        self.replay_backend = 'pynput'
+        self.dump_replay_timing = False
+        self.repeat_mode = 'once'
+        self.repeat_count = 10
+        self.repeat_minutes = 5
         self.settings_file = 'macro_settings.json'
         
     def save(self):
@@ -15,8 +27,20 @@ class Settings:
             'track_mouse': self.track_mouse,
             'track_keyboard': self.track_keyboard,
             'track_scroll': self.track_scroll,
+            'ignore_app_clicks': self.ignore_app_clicks,
             'record_key': self.record_key,
-            'replay_key': self.replay_key
+            'replay_key': self.replay_key,
+            'max_move_rate': self.max_move_rate,
+            'min_move_distance': self.min_move_distance,
+            'simplify_tolerance': self.simplify_tolerance,
+            'optimize_on_save': self.optimize_on_save,
+            'replay_speed': self.replay_speed,
+            'idle_gap_cap': self.idle_gap_cap,
+            'replay_backend': self.replay_backend,
+            'dump_replay_timing': self.dump_replay_timing,
+            'repeat_mode': self.repeat_mode,
+            'repeat_count': self.repeat_count,
+            'repeat_minutes': self.repeat_minutes
         }
         with open(self.settings_file, 'w') as f:
             json.dump(settings, f)
@@ -28,8 +52,20 @@ class Settings:
                 self.track_mouse = settings.get('track_mouse', True)
                 self.track_keyboard = settings.get('track_keyboard', True)
                 self.track_scroll = settings.get('track_scroll', True)
+                self.ignore_app_clicks = settings.get('ignore_app_clicks', False)
                 self.record_key = settings.get('record_key', 'ctrl+s')
                 self.replay_key = settings.get('replay_key', 'ctrl+r')
+                self.max_move_rate = settings.get('max_move_rate', 60)
+                self.min_move_distance = settings.get('min_move_distance', 3)
+                self.simplify_tolerance = settings.get('simplify_tolerance', 2.0)
+                self.optimize_on_save = settings.get('optimize_on_save', True)
+                self.replay_speed = settings.get('replay_speed', 1.0)
+                self.idle_gap_cap = settings.get('idle_gap_cap', 0)
+                self.replay_backend = settings.get('replay_backend', 'pynput')
+                self.dump_replay_timing = settings.get('dump_replay_timing', False)
+                self.repeat_mode = settings.get('repeat_mode', 'once')
+                self.repeat_count = settings.get('repeat_count', 10)
+                self.repeat_minutes = settings.get('repeat_minutes', 5)
         except FileNotFoundError:
             # Use default values if file doesn't exist
             pass 
\ No newline at end of file
@@ -0,0 +1,137 @@
+"""Play and inspect stored macros from the command line, without the GUI.
+
+Usage:
+    python -m src.player play [NAME] [--count N | --minutes M | --forever] [--speed X]
+    python -m src.player inspect [NAME]
+    python -m src.player list
+
+NAME is a favorite; without it the last recorded macro is used. Only the
+replay engine and FileHandler are loaded, PyQt6 is never imported.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils import macro_codec
+from utils.file_handler import FileHandler
+from models.settings import Settings
+
+def playback_options(settings, args):
+    """Return (speed, idle cap in seconds) like the main window does for a macro."""
+    speed = settings.replay_speed
+    idle_cap = settings.idle_gap_cap
+    if args.name:
+        info = FileHandler.favorite_info(args.name) or {}
+        speed = info.get('speed', speed)
+        idle_cap = info.get('idle_cap', idle_cap)
+    if args.speed is not None:
+        speed = args.speed
+    if args.idle_cap is not None:
+        idle_cap = args.idle_cap
+    return speed, idle_cap / 1000
+
+def play(args):
+    from utils.macro_cache import load_plan
+    from utils.replay_backends import create_backend, NullBackend
+    from utils.replay_engine import ReplayEngine
+
+    settings = Settings()
+    settings.load()
+    backend = NullBackend() if args.dry_run else create_backend(args.backend or settings.replay_backend)
+    plan = load_plan(args.name, *playback_options(settings, args), backend=backend)
+    if plan is None:
+        print(f"Macro not found: {args.name or 'last recording'}")
+        return 1
+
+    count = 0 if args.forever or args.minutes else args.count
+    duration = args.minutes * 60 if args.minutes else None
+    engine = ReplayEngine(backend)
+
+    def on_iteration(iteration, seconds):
+        if count != 1:
+            print(f"Iteration {iteration}" + (f"/{count}" if count else "") + f": {seconds:.2f} s")
+
+    try:
+        iterations = engine.run(plan, count, duration, on_iteration)
+    except KeyboardInterrupt:
+        engine.release_all()
+        print("Stopped")
+        iterations = None
+    finally:
+        backend.close()
+    if iterations is not None and args.dry_run:
+        print(f"Dry run: {backend.calls} operations in {iterations} iteration(s)")
+    summary = engine.timing.summary()
+    if summary:
+        print(summary)
+    return 0
+
+def inspect(args):
+    if args.name:
+        path = FileHandler.favorite_path(args.name)
+        columns = FileHandler.load_favorite(args.name)
+    else:
+        path = FileHandler.macro_path()
+        columns = FileHandler.load_macro_columns()
+    if columns is None:
+        print(f"Macro not found: {args.name or 'last recording'}")
+        return 1
+
+    print(f"File: {path} ({os.path.getsize(path)} bytes)")
+    print(f"Events: {len(columns)}")
+    print(f"Duration: {columns.time[-1] if len(columns) else 0.0:.2f} s")
+    for code, name in enumerate(macro_codec.TYPE_NAMES):
+        print(f"  {name}: {columns.type.count(code)}")
+    if args.name:
+        info = FileHandler.favorite_info(args.name) or {}
+        for field in ('speed', 'idle_cap', 'hotkey'):
+            if field in info:
+                print(f"{field}: {info[field]}")
+    if args.keys:
+        print("Keys: " + ', '.join(columns.keys))
+    return 0
+
+def list_favorites(args):
+    for name in FileHandler.favorite_names():
+        info = FileHandler.favorite_info(name) or {}
+        line = f"{name}: {info.get('events', '?')} events, {info.get('duration', 0.0):.2f} s"
+        if info.get('hotkey'):
+            line += f", hotkey {info['hotkey']}"
+        print(line)
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m src.player',
+                                     description="Play and inspect TinyTask macros without the GUI")
+    parser.add_argument('--data-dir', help="directory holding the macros and settings (default: current)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    play_parser = commands.add_parser('play', help="play the last recording or a favorite")
+    play_parser.add_argument('name', nargs='?', help="favorite to play")
+    repeat = play_parser.add_mutually_exclusive_group()
+    repeat.add_argument('--count', type=int, default=1, help="number of iterations")
+    repeat.add_argument('--minutes', type=float, help="repeat for this many minutes")
+    repeat.add_argument('--forever', action='store_true', help="repeat until interrupted")
+    play_parser.add_argument('--speed', type=float, help="playback speed factor")
+    play_parser.add_argument('--idle-cap', type=int, help="longest idle gap in ms, 0 for off")
+    play_parser.add_argument('--backend', help="replay output: pynput, xtest or null")
+    play_parser.add_argument('--dry-run', action='store_true', help="schedule the macro without sending input")
+    play_parser.set_defaults(handler=play)
+
+    inspect_parser = commands.add_parser('inspect', help="describe the last recording or a favorite")
+    inspect_parser.add_argument('name', nargs='?', help="favorite to inspect")
+    inspect_parser.add_argument('--keys', action='store_true', help="list the recorded keys and buttons")
+    inspect_parser.set_defaults(handler=inspect)
+
+    list_parser = commands.add_parser('list', help="list the favorites")
+    list_parser.set_defaults(handler=list_favorites)
+
+    args = parser.parse_args(argv)
+    if args.data_dir:
+        os.chdir(args.data_dir)
+    return args.handler(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,35 @@
+import threading
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
-                            QPushButton, QListWidget, QMessageBox)
+                            QPushButton, QListWidget, QMessageBox, QSpinBox,
+                            QDoubleSpinBox)
 from PyQt6.QtGui import QFont
+from PyQt6.QtCore import pyqtSignal
 from utils.file_handler import FileHandler
+from utils.macro_cache import macro_cache, load_plan
+from utils.macro_optimizer import optimize_macro
+from utils.input_hub import keyboard_hub
+from utils.hotkeys import key_code, parse_chord
 
 class FavoritesDialog(QDialog):
+    # (succeeded, message) of an optimization run on a worker thread
+    optimize_finished = pyqtSignal(bool, str)
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         self.parent = parent
+        self.optimizing = False
         self.setWindowTitle("Favorite Macros")
-        self.setFixedSize(400, 500)
+        self.setFixedSize(400, 675)
+        
+        # Key detection variables
+        self.key_combination = []
+        self.listening_for_keys = False
+        self.key_subscription = None
         
         self.setup_ui()
         self.setup_styles()
         self.load_favorites()
+        self.optimize_finished.connect(self.on_optimize_finished)
         
     def setup_ui(self):
         layout = QVBoxLayout(self)
@@ -26,8 +43,44 @@ class FavoritesDialog(QDialog):
         
         # Macro list
         self.macro_list = QListWidget()
+        self.macro_list.currentItemChanged.connect(self.load_selected_options)
         layout.addWidget(self.macro_list)
         
+        # Playback options of the selected macro
+        options_layout = QHBoxLayout()
+        options_layout.addWidget(QLabel("Speed:"))
+        self.speed_input = QDoubleSpinBox()
+        self.speed_input.setRange(0.1, 100)
+        self.speed_input.setSingleStep(0.5)
+        self.speed_input.setSuffix("x")
+        options_layout.addWidget(self.speed_input)
+        options_layout.addWidget(QLabel("Max idle (ms):"))
+        self.idle_cap_input = QSpinBox()
+        self.idle_cap_input.setRange(0, 600000)
+        self.idle_cap_input.setSingleStep(100)
+        self.idle_cap_input.setSpecialValueText("Off")
+        options_layout.addWidget(self.idle_cap_input)
+        layout.addLayout(options_layout)
+        
+        hotkey_layout = QHBoxLayout()
+        hotkey_layout.addWidget(QLabel("Hotkey:"))
+        self.hotkey_input = QPushButton("None")
+        self.hotkey_input.setObjectName("hotkeyInput")
+        self.hotkey_input.clicked.connect(self.start_key_detection)
+        hotkey_layout.addWidget(self.hotkey_input)
+        clear_hotkey_button = QPushButton("Clear")
+        clear_hotkey_button.clicked.connect(lambda: self.hotkey_input.setText("None"))
+        hotkey_layout.addWidget(clear_hotkey_button)
+        layout.addLayout(hotkey_layout)
+        
+        save_options_button = QPushButton("Save Options")
+        save_options_button.clicked.connect(self.save_selected_options)
+        layout.addWidget(save_options_button)
+        
+        self.optimize_button = QPushButton("Optimize")
+        self.optimize_button.clicked.connect(self.optimize_selected_macro)
+        layout.addWidget(self.optimize_button)
+        
         # Buttons
         button_layout = QHBoxLayout()
         play_button = QPushButton("Play")
@@ -77,24 +130,172 @@ class FavoritesDialog(QDialog):
             QPushButton[delete="true"]:hover {
                 background-color: #c0392b;
             }
+            QPushButton#hotkeyInput {
+                background-color: white;
+                color: #2c3e50;
+                border: 2px solid #bdc3c7;
+            }
+            QPushButton#hotkeyInput[listening="true"] {
+                background-color: #e8f5e9;
+                border-color: #2ecc71;
+            }
+            QSpinBox, QDoubleSpinBox {
+                background-color: white;
+                color: #2c3e50;
+                border: 2px solid #bdc3c7;
+                border-radius: 4px;
+                padding: 4px;
+            }
         """)
     
     def load_favorites(self):
         self.macro_list.clear()
-        favorites = FileHandler.load_favorites()
-        for name in favorites.keys():
+        for name in FileHandler.favorite_names():
             self.macro_list.addItem(name)
     
+    def load_selected_options(self, current_item, previous_item=None):
+        speed = self.parent.settings.replay_speed
+        idle_cap = self.parent.settings.idle_gap_cap
+        hotkey = None
+        if current_item:
+            info = FileHandler.favorite_info(current_item.text()) or {}
+            speed = info.get('speed', speed)
+            idle_cap = info.get('idle_cap', idle_cap)
+            hotkey = info.get('hotkey')
+        self.speed_input.setValue(speed)
+        self.idle_cap_input.setValue(idle_cap)
+        self.hotkey_input.setText(hotkey or "None")
+        
+    def start_key_detection(self):
+        if self.listening_for_keys:
+            return
+            
+        self.listening_for_keys = True
+        self.key_combination = []
+        self.hotkey_input.setProperty("listening", True)
+        self.hotkey_input.setText("Press key combination...")
+        self.hotkey_input.style().unpolish(self.hotkey_input)
+        self.hotkey_input.style().polish(self.hotkey_input)
+        
+        # Capture ahead of the global hotkeys so the pressed keys do not trigger them
+        self.key_subscription = keyboard_hub.subscribe(
+            first=True,
+            on_press=self.on_key_press,
+            on_release=self.on_key_release
+        )
+        
+    def on_key_press(self, key):
+        if not self.listening_for_keys:
+            return
+            
+        key_str = key_code(key)
+        if key_str not in self.key_combination:
+            self.key_combination.append(key_str)
+            self.hotkey_input.setText('+'.join(self.key_combination))
+        return True
+            
+    def on_key_release(self, key):
+        if not self.listening_for_keys:
+            return
+            
+        self.listening_for_keys = False
+        if self.key_subscription:
+            keyboard_hub.unsubscribe(self.key_subscription)
+            self.key_subscription = None
+            
+        self.hotkey_input.setProperty("listening", False)
+        self.hotkey_input.style().unpolish(self.hotkey_input)
+        self.hotkey_input.style().polish(self.hotkey_input)
+        return True
+        
+    def hotkey_conflict(self, macro_name, hotkey):
+        """Return a description of what already uses ``hotkey``, or None."""
+        chord = parse_chord(hotkey)
+        if chord == parse_chord(self.parent.record_shortcut):
+            return "the record shortcut"
+        if chord == parse_chord(self.parent.replay_shortcut):
+            return "the play shortcut"
+        for name in FileHandler.favorite_names():
+            info = FileHandler.favorite_info(name) or {}
+            if name != macro_name and info.get('hotkey') and parse_chord(info['hotkey']) == chord:
+                return f"the macro '{name}'"
+        return None
+        
+    def save_selected_options(self):
+        current_item = self.macro_list.currentItem()
+        if not current_item:
+            QMessageBox.warning(self, "Warning", "Please select a macro!")
+            return
+            
+        macro_name = current_item.text()
+        hotkey = self.hotkey_input.text().lower()
+        if hotkey in ("none", "press key combination..."):
+            hotkey = None
+        if hotkey:
+            conflict = self.hotkey_conflict(macro_name, hotkey)
+            if conflict:
+                QMessageBox.critical(self, "Error", f"This hotkey is already used by {conflict}!")
+                return
+                
+        if FileHandler.update_favorite_info(macro_name,
+                                            speed=self.speed_input.value(),
+                                            idle_cap=self.idle_cap_input.value(),
+                                            hotkey=hotkey):
+            self.parent.update_hotkeys()
+        else:
+            QMessageBox.critical(self, "Error", "Could not save options!")
+    
+    def optimize_selected_macro(self):
+        current_item = self.macro_list.currentItem()
+        if not current_item:
+            QMessageBox.warning(self, "Warning", "Please select a macro!")
+            return
+        if self.optimizing:
+            return
+            
+        # Long macros take seconds to optimize, keep the dialog responsive
+        self.optimizing = True
+        self.optimize_button.setEnabled(False)
+        self.optimize_button.setText("Optimizing...")
+        threading.Thread(target=self.optimize_macro, args=(current_item.text(),), daemon=True).start()
+        
+    def optimize_macro(self, macro_name):
+        """Optimize and save a favorite, off the GUI thread."""
+        columns = FileHandler.load_favorite(macro_name)
+        if columns is None:
+            self.optimize_finished.emit(False, "Could not load macro!")
+            return
+        result = optimize_macro(columns)
+        if not result.changed:
+            self.optimize_finished.emit(True, "This macro is already optimized.")
+            return
+        if FileHandler.save_favorite(macro_name, result.columns):
+            macro_cache.put(macro_name, result.columns)
+            self.optimize_finished.emit(True, result.summary())
+        else:
+            self.optimize_finished.emit(False, "Could not save macro!")
+            
+    def on_optimize_finished(self, succeeded, message):
+        self.optimizing = False
+        self.optimize_button.setEnabled(True)
+        self.optimize_button.setText("Optimize")
+        if succeeded:
+            self.parent.update_hotkeys()
+            QMessageBox.information(self, "Optimize", message)
+        else:
+            QMessageBox.critical(self, "Error", message)
+    
     def play_selected_macro(self):
         current_item = self.macro_list.currentItem()
         if not current_item:
             QMessageBox.warning(self, "Warning", "Please select a macro!")
             return
             
-        favorites = FileHandler.load_favorites()
         macro_name = current_item.text()
-        if macro_name in favorites:
-            self.parent.replay_actions(favorites[macro_name], macro_name)
+        plan = load_plan(macro_name, *self.parent.playback_options(macro_name),
+                         backend=self.parent.backend)
+        if plan is not None:
+            self.parent.replay_actions(plan, macro_name)
             self.close()
     
     def delete_selected_macro(self):
@@ -110,6 +311,8 @@ class FavoritesDialog(QDialog):
         if reply == QMessageBox.StandardButton.Yes:
             macro_name = current_item.text()
             if FileHandler.delete_favorite(macro_name):
+                macro_cache.invalidate(macro_name)
                 self.load_favorites()
+                self.parent.update_hotkeys()
             else:
                 QMessageBox.critical(self, "Error", "Failed to delete macro!") 
\ No newline at end of file
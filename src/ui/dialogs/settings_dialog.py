@@ -1,15 +1,19 @@
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
-                            QPushButton, QMessageBox)
+                            QPushButton, QMessageBox, QSpinBox, QDoubleSpinBox,
+                            QComboBox, QCheckBox)
 from PyQt6.QtGui import QFont
 from PyQt6.QtCore import Qt
-from pynput import keyboard
+
+from utils.input_hub import keyboard_hub
+from utils.hotkeys import key_code
+from utils.replay_backends import BACKEND_CHOICES
 
 class SettingsDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.parent = parent
         self.setWindowTitle("Settings")
-        self.setFixedSize(300, 250)
+        self.setFixedSize(300, 645)
         
         self.setup_ui()
         self.setup_styles()
@@ -18,9 +22,11 @@ class SettingsDialog(QDialog):
         self.current_button = None
         self.key_combination = []
         self.listening_for_keys = False
+        self.key_subscription = None
         
         # Show current shortcuts
         self.update_button_texts()
+        self.update_capture_inputs()
         
     def setup_ui(self):
         layout = QVBoxLayout(self)
@@ -52,6 +58,78 @@ class SettingsDialog(QDialog):
         replay_layout.addWidget(self.replay_input)
         layout.addLayout(replay_layout)
         
+        # Mouse capture policy
+        capture_title = QLabel("Mouse Capture")
+        capture_title.setFont(QFont('Arial', 12, QFont.Weight.Bold))
+        layout.addWidget(capture_title)
+        
+        rate_layout = QHBoxLayout()
+        rate_label = QLabel("Max rate (Hz):")
+        self.move_rate_input = QSpinBox()
+        self.move_rate_input.setRange(0, 1000)
+        self.move_rate_input.setSpecialValueText("Unlimited")
+        rate_layout.addWidget(rate_label)
+        rate_layout.addWidget(self.move_rate_input)
+        layout.addLayout(rate_layout)
+        
+        distance_layout = QHBoxLayout()
+        distance_label = QLabel("Min distance (px):")
+        self.move_distance_input = QSpinBox()
+        self.move_distance_input.setRange(0, 100)
+        distance_layout.addWidget(distance_label)
+        distance_layout.addWidget(self.move_distance_input)
+        layout.addLayout(distance_layout)
+        
+        tolerance_layout = QHBoxLayout()
+        tolerance_label = QLabel("Path smoothing (px):")
+        self.simplify_input = QDoubleSpinBox()
+        self.simplify_input.setRange(0, 50)
+        self.simplify_input.setSingleStep(0.5)
+        self.simplify_input.setSpecialValueText("Off")
+        tolerance_layout.addWidget(tolerance_label)
+        tolerance_layout.addWidget(self.simplify_input)
+        layout.addLayout(tolerance_layout)
+        
+        self.optimize_input = QCheckBox("Optimize macros on save")
+        layout.addWidget(self.optimize_input)
+        
+        # Playback defaults
+        playback_title = QLabel("Playback")
+        playback_title.setFont(QFont('Arial', 12, QFont.Weight.Bold))
+        layout.addWidget(playback_title)
+        
+        speed_layout = QHBoxLayout()
+        speed_label = QLabel("Speed:")
+        self.speed_input = QDoubleSpinBox()
+        self.speed_input.setRange(0.1, 100)
+        self.speed_input.setSingleStep(0.5)
+        self.speed_input.setSuffix("x")
+        speed_layout.addWidget(speed_label)
+        speed_layout.addWidget(self.speed_input)
+        layout.addLayout(speed_layout)
+        
+        idle_layout = QHBoxLayout()
+        idle_label = QLabel("Max idle (ms):")
+        self.idle_cap_input = QSpinBox()
+        self.idle_cap_input.setRange(0, 600000)
+        self.idle_cap_input.setSingleStep(100)
+        self.idle_cap_input.setSpecialValueText("Off")
+        idle_layout.addWidget(idle_label)
+        idle_layout.addWidget(self.idle_cap_input)
+        layout.addLayout(idle_layout)
+        
+        backend_layout = QHBoxLayout()
+        backend_label = QLabel("Output:")
+        self.backend_input = QComboBox()
+        for name, label in BACKEND_CHOICES:
+            self.backend_input.addItem(label, name)
+        backend_layout.addWidget(backend_label)
+        backend_layout.addWidget(self.backend_input)
+        layout.addLayout(backend_layout)
+        
+        self.timing_dump_input = QCheckBox("Save replay timing log")
+        layout.addWidget(self.timing_dump_input)
+        
         # Buttons
         button_layout = QHBoxLayout()
         reset_button = QPushButton("Reset")
@@ -100,12 +178,31 @@ class SettingsDialog(QDialog):
             QPushButton#resetButton:hover {
                 background-color: #c0392b;
             }
+            QSpinBox, QDoubleSpinBox, QComboBox {
+                background-color: #ffffff;
+                color: #2c3e50;
+                border: 2px solid #bdc3c7;
+                border-radius: 4px;
+                padding: 4px;
+            }
         """)
         
     def update_button_texts(self):
         self.record_input.setText(self.parent.record_shortcut)
         self.replay_input.setText(self.parent.replay_shortcut)
         
+    def update_capture_inputs(self):
+        settings = self.parent.settings
+        self.move_rate_input.setValue(settings.max_move_rate)
+        self.move_distance_input.setValue(settings.min_move_distance)
+        self.simplify_input.setValue(settings.simplify_tolerance)
+        self.optimize_input.setChecked(settings.optimize_on_save)
+        self.speed_input.setValue(settings.replay_speed)
+        self.idle_cap_input.setValue(settings.idle_gap_cap)
+        index = self.backend_input.findData(settings.replay_backend)
+        self.backend_input.setCurrentIndex(max(index, 0))
+        self.timing_dump_input.setChecked(settings.dump_replay_timing)
+        
     def start_key_detection(self, button):
         if self.listening_for_keys:
             return
@@ -118,50 +215,42 @@ class SettingsDialog(QDialog):
         button.style().unpolish(button)
         button.style().polish(button)
         
-        self.key_listener = keyboard.Listener(
+        # Capture ahead of the global hotkeys so the pressed keys do not trigger them
+        self.key_subscription = keyboard_hub.subscribe(
+            first=True,
             on_press=self.on_key_press,
             on_release=self.on_key_release
         )
-        self.key_listener.start()
         
     def on_key_press(self, key):
         if not self.listening_for_keys:
             return
             
-        try:
-            key_str = key.char
-        except AttributeError:
-            key_str = str(key).replace('Key.', '')
-            
+        key_str = key_code(key)
         if key_str not in self.key_combination:
             self.key_combination.append(key_str)
             self.current_button.setText('+'.join(self.key_combination))
+        return True
             
     def on_key_release(self, key):
         if not self.listening_for_keys:
             return
             
         self.listening_for_keys = False
-        if self.key_listener:
-            self.key_listener.stop()
+        if self.key_subscription:
+            keyboard_hub.unsubscribe(self.key_subscription)
+            self.key_subscription = None
             
         self.current_button.setProperty("listening", False)
         self.current_button.style().unpolish(self.current_button)
         self.current_button.style().polish(self.current_button)
+        return True
         
     def reset_settings(self):
         self.parent.record_shortcut = "r"
         self.parent.replay_shortcut = "s"
         self.update_button_texts()
         
-        if self.parent.hotkey_listener:
-            self.parent.hotkey_listener.stop()
-        self.parent.hotkey_listener = keyboard.Listener(
-            on_press=self.parent.on_key_press,
-            on_release=self.parent.on_key_release
-        )
-        self.parent.hotkey_listener.start()
-        
         self.parent.save_settings()
         self.parent.update_shortcut_status()
         QMessageBox.information(self, "Info", "Shortcut keys have been reset!")
@@ -180,5 +269,13 @@ class SettingsDialog(QDialog):
             
         self.parent.record_shortcut = record_key
         self.parent.replay_shortcut = replay_key
+        self.parent.settings.max_move_rate = self.move_rate_input.value()
+        self.parent.settings.min_move_distance = self.move_distance_input.value()
+        self.parent.settings.simplify_tolerance = self.simplify_input.value()
+        self.parent.settings.optimize_on_save = self.optimize_input.isChecked()
+        self.parent.settings.replay_speed = self.speed_input.value()
+        self.parent.settings.idle_gap_cap = self.idle_cap_input.value()
+        self.parent.settings.replay_backend = self.backend_input.currentData()
+        self.parent.settings.dump_replay_timing = self.timing_dump_input.isChecked()
         self.parent.save_settings()
         self.close() 
\ No newline at end of file
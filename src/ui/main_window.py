@@ -1,37 +1,66 @@
 import sys
 import os
+import threading
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                             QPushButton, QCheckBox, QLabel, QFrame, QMessageBox,
-                            QInputDialog, QDialog, QApplication)
+                            QInputDialog, QDialog, QApplication, QComboBox, QSpinBox)
 from PyQt6.QtGui import QFont, QIcon
-from PyQt6.QtCore import Qt
-from pynput import mouse, keyboard
-from pynput.mouse import Controller as MouseController
-from pynput.keyboard import Controller as KeyboardController
-import time
+from PyQt6.QtCore import Qt, pyqtSignal, QTimer
 
 from ui.styles.app_styles import AppStyles
-from ui.dialogs.settings_dialog import SettingsDialog
-from ui.dialogs.favorites_dialog import FavoritesDialog
 from utils.file_handler import FileHandler
 from utils.replay_thread import ReplayThread
+from utils.replay_backends import create_backend
+from utils.macro_cache import macro_cache, load_plan, STREAM_THRESHOLD
+from utils.recording_buffer import RecordingBuffer
+from utils.path_simplify import MoveSimplifier, count_moves
+from utils.macro_optimizer import MacroOptimizer
+from utils.recording_journal import RecordingJournal, iter_journal, discard_journal
+from utils.hotkeys import ChordMatcher
+from utils.recording_stats import RecordingStats, save_report
+from utils.startup_timer import startup_timer
 from models.settings import Settings
 
+# pynput is slow to import, so the input hooks and the dialogs that use
+# them are loaded by load_input_modules() once the window is on screen
+keyboard_hub = mouse_hub = None
+SettingsDialog = FavoritesDialog = None
+
+def load_input_modules():
+    """Import the pynput input hooks and the dialogs built on them."""
+    global keyboard_hub, mouse_hub, SettingsDialog, FavoritesDialog
+    from utils.input_hub import keyboard_hub, mouse_hub
+    from ui.dialogs.settings_dialog import SettingsDialog
+    from ui.dialogs.favorites_dialog import FavoritesDialog
+
 class MacroRecorder(QMainWindow):
+    REPEAT_MODES = (
+        ('once', "Play once"),
+        ('count', "Repeat N times"),
+        ('duration', "Repeat for N minutes"),
+        ('forever', "Repeat until stopped"),
+    )
+    recording_saved = pyqtSignal(str)
+    # Emitted from the input listener thread, handled on the GUI thread
+    record_hotkey_pressed = pyqtSignal()
+    
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Macro Recorder")
-        self.setFixedSize(350, 650)
+        self.setFixedSize(350, 730)
         
-        # Initialize controllers
-        self.mouse = MouseController()
-        self.keyboard = KeyboardController()
         self.recording = False
         self.is_replaying = False
-        self.actions = []
-        self.start_time = 0
+        self.recording_buffer = None
+        self.journal = None
+        self.saving_recording = False
+        # Screen rectangles (left, top, right, bottom) whose clicks are not recorded.
+        # Kept up to date from Qt events so the listener thread never queries widgets.
+        self.click_exclusion_zones = ()
         self.active_macro_name = None
-        self.active_keys = []
+        self.hotkeys = ChordMatcher()
+        self.favorite_plans = {}
+        self.hotkey_generation = 0
         
         # Load settings
         self.settings = Settings()
@@ -39,15 +68,50 @@ class MacroRecorder(QMainWindow):
         self.record_shortcut = self.settings.record_key
         self.replay_shortcut = self.settings.replay_key
         
-        # Dialog references
+        # Created in finish_startup() once the window has been painted
+        self.backend = None
+        self.recording_stats = RecordingStats()
+        self.mouse_subscription = None
+        self.keyboard_subscription = None
+        self.started = False
+        
+        # Dialogs are created when first opened
         self.settings_dialog = None
         self.favorites_dialog = None
         
         self.setup_ui()
         self.setup_icon()
-        self.setup_listeners()
         self.update_shortcut_status()
         
+        # Live recorder load in the status frame while recording
+        self.stats_timer = QTimer(self)
+        self.stats_timer.setInterval(1000)
+        self.stats_timer.timeout.connect(self.update_recording_stats)
+        
+        self.recording_saved.connect(self.on_recording_saved)
+        self.record_hotkey_pressed.connect(self.toggle_recording)
+        
+    def finish_startup(self):
+        """Start everything the first paint does not need: input hooks, replay output and caches."""
+        load_input_modules()
+        startup_timer.mark("Import input hooks")
+        
+        # Output the replays are played on
+        self.backend = create_backend(self.settings.replay_backend)
+        self.setup_listeners()
+        self.update_hotkeys()
+        
+        if os.path.exists(FileHandler.JOURNAL_FILE):
+            self.recover_recording()
+        else:
+            # Parse and compile saved macros in the background so the first play skips the disk
+            macro_cache.warm_async([None] + FileHandler.favorite_names(), self.playback_options,
+                                   self.backend)
+        startup_timer.mark("Start input hooks")
+        startup_timer.report()
+        if startup_timer.exit_after_report:
+            QApplication.instance().quit()
+        
     def setup_ui(self):
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
@@ -101,18 +165,37 @@ class MacroRecorder(QMainWindow):
         self.track_mouse_var = QCheckBox("Track Mouse Movements")
         self.track_keyboard_var = QCheckBox("Track Keyboard Keys")
         self.track_scroll_var = QCheckBox("Track Mouse Scrolling")
+        self.ignore_app_clicks_var = QCheckBox("Ignore Clicks on This Window")
         
         self.track_mouse_var.setChecked(self.settings.track_mouse)
         self.track_keyboard_var.setChecked(self.settings.track_keyboard)
         self.track_scroll_var.setChecked(self.settings.track_scroll)
+        self.ignore_app_clicks_var.setChecked(self.settings.ignore_app_clicks)
         
         self.track_mouse_var.stateChanged.connect(self.save_settings)
         self.track_keyboard_var.stateChanged.connect(self.save_settings)
         self.track_scroll_var.stateChanged.connect(self.save_settings)
+        self.ignore_app_clicks_var.stateChanged.connect(self.save_settings)
         
         options_layout.addWidget(self.track_mouse_var)
         options_layout.addWidget(self.track_keyboard_var)
         options_layout.addWidget(self.track_scroll_var)
+        options_layout.addWidget(self.ignore_app_clicks_var)
+        
+        repeat_layout = QHBoxLayout()
+        self.repeat_mode_input = QComboBox()
+        for mode, label in self.REPEAT_MODES:
+            self.repeat_mode_input.addItem(label, mode)
+        self.repeat_value_input = QSpinBox()
+        self.repeat_value_input.setRange(1, 100000)
+        self.repeat_mode_input.setCurrentIndex(
+            max(0, self.repeat_mode_input.findData(self.settings.repeat_mode)))
+        self.update_repeat_value()
+        self.repeat_mode_input.currentIndexChanged.connect(self.on_repeat_mode_changed)
+        self.repeat_value_input.valueChanged.connect(self.on_repeat_value_changed)
+        repeat_layout.addWidget(self.repeat_mode_input)
+        repeat_layout.addWidget(self.repeat_value_input)
+        options_layout.addLayout(repeat_layout)
         layout.addWidget(options_frame)
         
         # Status Frame
@@ -134,11 +217,46 @@ class MacroRecorder(QMainWindow):
         self.active_macro_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         status_layout.addWidget(self.active_macro_label)
         
+        self.info_label = QLabel()
+        self.info_label.setObjectName("infoLabel")
+        self.info_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        status_layout.addWidget(self.info_label)
+        
         layout.addWidget(status_frame)
         
         # Apply styles
         self.setStyleSheet(AppStyles.get_all_styles())
         
+    def update_exclusion_zones(self):
+        button_pos = self.record_button.mapToGlobal(self.record_button.rect().topLeft())
+        button_rect = self.record_button.rect()
+        zones = [(button_pos.x(), button_pos.y(),
+                  button_pos.x() + button_rect.width(), button_pos.y() + button_rect.height())]
+        if self.settings.ignore_app_clicks:
+            frame = self.frameGeometry()
+            zones.append((frame.left(), frame.top(), frame.right(), frame.bottom()))
+        self.click_exclusion_zones = tuple(zones)
+        
+    def moveEvent(self, event):
+        super().moveEvent(event)
+        self.update_exclusion_zones()
+        
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_exclusion_zones()
+        
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.update_exclusion_zones()
+        
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.started:
+            self.started = True
+            startup_timer.mark("First paint")
+            # Runs from the event loop once this paint has been flushed
+            QTimer.singleShot(0, self.finish_startup)
+        
     def setup_icon(self):
         if getattr(sys, 'frozen', False):
             base_path = sys._MEIPASS
@@ -153,19 +271,28 @@ class MacroRecorder(QMainWindow):
             app.setWindowIcon(icon)
             
     def setup_listeners(self):
-        self.mouse_listener = None
-        self.keyboard_listener = None
-        self.hotkey_listener = keyboard.Listener(
-            on_press=self.on_key_press,
-            on_release=self.on_key_release
+        # Hotkeys and recorded key events share one keyboard subscription;
+        # the mouse hook only runs while a recording needs it
+        self.keyboard_subscription = keyboard_hub.subscribe(
+            on_press=self.recording_stats.timed('on_key_press', self.on_key_press),
+            on_release=self.recording_stats.timed('on_key_release', self.on_key_release)
         )
-        self.hotkey_listener.start()
         
     def toggle_recording(self):
+        if not self.recording and self.saving_recording:
+            # The new journal would replace the one being saved
+            QMessageBox.warning(self, "Warning", "The recording is still being saved!")
+            return
         if not self.recording and not (self.track_mouse_var.isChecked() or self.track_keyboard_var.isChecked() or self.track_scroll_var.isChecked()):
             QMessageBox.critical(self, "Error", "At least one tracking option must be enabled!")
             return
             
+        if not self.recording:
+            # The listener threads record into the buffer as soon as recording is set
+            self.recording_buffer = RecordingBuffer(
+                max_move_rate=self.settings.max_move_rate,
+                min_move_distance=self.settings.min_move_distance
+            )
         self.recording = not self.recording
         
         if self.recording:
@@ -174,169 +301,331 @@ class MacroRecorder(QMainWindow):
             self.record_button.setText("Stop Recording")
             self.record_button.setProperty("recording", True)
             self.status_label.setText(f"Recording...\nPress '{self.record_shortcut.upper()}' again to stop")
-            self.actions = []
-            self.start_time = time.time()
+            self.journal = RecordingJournal(FileHandler.JOURNAL_FILE, self.recording_buffer)
+            self.journal.start()
+            self.recording_stats.reset()
+            self.stats_timer.start()
             
             if self.track_mouse_var.isChecked() or self.track_scroll_var.isChecked():
-                self.mouse_listener = mouse.Listener(
-                    on_move=self.on_move,
-                    on_click=self.on_click,
-                    on_scroll=self.on_scroll
-                )
-                self.mouse_listener.start()
-            
-            if self.track_keyboard_var.isChecked():
-                self.keyboard_listener = keyboard.Listener(
-                    on_press=self.on_key_press,
-                    on_release=self.on_key_release
+                stats = self.recording_stats
+                self.mouse_subscription = mouse_hub.subscribe(
+                    on_move=stats.timed('on_move', self.on_move),
+                    on_click=stats.timed('on_click', self.on_click),
+                    on_scroll=stats.timed('on_scroll', self.on_scroll)
                 )
-                self.keyboard_listener.start()
         else:
             self.record_button.setText("Start Recording")
             self.record_button.setProperty("recording", False)
             self.update_shortcut_status()
             
-            if self.mouse_listener:
-                self.mouse_listener.stop()
-            if self.keyboard_listener:
-                self.keyboard_listener.stop()
+            if self.mouse_subscription:
+                mouse_hub.unsubscribe(self.mouse_subscription)
+                self.mouse_subscription = None
+            self.stats_timer.stop()
             
-            FileHandler.save_macro(self.actions)
+            self.save_recording()
         
         self.record_button.style().unpolish(self.record_button)
         self.record_button.style().polish(self.record_button)
         
+    def update_recording_stats(self):
+        if self.recording:
+            self.info_label.setText(self.recording_stats.live_text(len(self.recording_buffer)))
+        
+    def save_recording(self):
+        self.saving_recording = True
+        self.info_label.setText("Saving recording...")
+        buffer = self.recording_buffer
+        report = self.recording_stats.report(
+            moves_seen=buffer.moves_seen,
+            moves_stored=buffer.moves_stored,
+            moves_coalesced=buffer.moves_seen - buffer.moves_stored
+        )
+        threading.Thread(target=self.finish_recording,
+                         args=(self.journal, buffer.moves_seen, report),
+                         daemon=True).start()
+        self.journal = None
+        
+    def recover_recording(self):
+        self.saving_recording = True
+        self.info_label.setText("Recovering unsaved recording...")
+        threading.Thread(target=self.finish_recording, daemon=True).start()
+        
+    def finish_recording(self, journal=None, moves_seen=0, report=None):
+        """Turn the recording journal into the saved macro, off the GUI thread.
+
+        The journal is read, simplified, optimized and written block by block,
+        so saving a long recording needs no more memory than recording it did.
+        """
+        if journal:
+            journal.close()
+        recorded = 0
+        moves_kept = 0
+        simplifier = MoveSimplifier(self.settings.simplify_tolerance)
+        optimizer = MacroOptimizer() if self.settings.optimize_on_save else None
+
+        def optimized(block):
+            nonlocal moves_kept
+            if optimizer:
+                block = optimizer.feed(block)
+            moves_kept += count_moves(block)
+            return block
+
+        def saved_blocks():
+            nonlocal recorded, moves_kept
+            for block in iter_journal(FileHandler.JOURNAL_FILE):
+                recorded += len(block)
+                yield optimized(simplifier.feed(block))
+            yield optimized(simplifier.finish())
+            if optimizer:
+                block = optimizer.finish()
+                moves_kept += count_moves(block)
+                yield block
+
+        try:
+            saved = FileHandler.save_macro_blocks(saved_blocks())
+            macro_cache.invalidate(None)
+            if saved and saved <= STREAM_THRESHOLD:
+                macro_cache.columns(None)
+            discard_journal(FileHandler.JOURNAL_FILE)
+            if report is not None:
+                report.update(events_recorded=recorded, events_saved=saved)
+                if optimizer:
+                    report['optimizer'] = optimizer.result().stats()
+                save_report(FileHandler.RECORDING_REPORT_FILE, report)
+        except (OSError, ValueError) as e:
+            self.recording_saved.emit(f"Error saving recording: {str(e)}")
+            return
+            
+        if journal is None:
+            info = f"Recovered unsaved recording\n{saved} events"
+        else:
+            info = f"Saved {saved} events"
+        if moves_seen:
+            kept = moves_kept / moves_seen * 100
+            info += f"\nKept {kept:.1f}% of {moves_seen} mouse moves"
+        if optimizer and optimizer.result().changed:
+            info += "\n" + optimizer.result().summary()
+        self.recording_saved.emit(info)
+        
+    def on_recording_saved(self, info):
+        self.saving_recording = False
+        self.info_label.setText(info)
+        
     def on_move(self, x, y):
-        if self.recording and self.track_mouse_var.isChecked():
-            current_time = time.time() - self.start_time
-            self.actions.append({
-                'type': 'move',
-                'x': x,
-                'y': y,
-                'time': current_time
-            })
+        if self.recording:
+            if self.settings.track_mouse:
+                self.recording_buffer.add_move(x, y)
+            else:
+                self.recording_stats.filter('untracked_moves')
     
     def on_click(self, x, y, button, pressed):
         if self.recording:
-            button_pos = self.record_button.mapToGlobal(self.record_button.rect().topLeft())
-            button_rect = self.record_button.rect()
-            
-            if not (button_pos.x() <= x <= button_pos.x() + button_rect.width() and 
-                   button_pos.y() <= y <= button_pos.y() + button_rect.height()):
-                current_time = time.time() - self.start_time
-                self.actions.append({
-                    'type': 'click',
-                    'x': x,
-                    'y': y,
-                    'button': str(button),
-                    'pressed': pressed,
-                    'time': current_time
-                })
+            for left, top, right, bottom in self.click_exclusion_zones:
+                if left <= x <= right and top <= y <= bottom:
+                    self.recording_stats.filter('excluded_clicks')
+                    return
+            self.recording_buffer.add_click(x, y, str(button), pressed)
 
     def on_scroll(self, x, y, dx, dy):
-        if self.recording and self.track_scroll_var.isChecked():
-            current_time = time.time() - self.start_time
-            self.actions.append({
-                'type': 'scroll',
-                'x': x,
-                'y': y,
-                'dx': dx,
-                'dy': dy,
-                'time': current_time
-            })
+        if self.recording:
+            if self.settings.track_scroll:
+                self.recording_buffer.add_scroll(x, y, dx, dy)
+            else:
+                self.recording_stats.filter('untracked_scrolls')
     
     def on_key_press(self, key):
         if self.settings_dialog and self.settings_dialog.isVisible():
             return
             
-        try:
-            key_char = key.char
-        except AttributeError:
-            key_char = str(key).replace('Key.', '')
-            
-        if key_char not in self.active_keys:
-            self.active_keys.append(key_char)
-            current_combination = '+'.join(sorted(self.active_keys))
-            
-            if current_combination == self.record_shortcut.lower():
-                self.toggle_recording()
-                return
-            elif current_combination == self.replay_shortcut.lower():
-                self.replay_macro()
+        is_new, action = self.hotkeys.press(key)
+        if is_new:
+            if action:
+                if self.recording:
+                    self.recording_stats.filter('hotkeys')
+                action()
                 return
                 
-            if self.recording and self.track_keyboard_var.isChecked():
-                current_time = time.time() - self.start_time
+            if self.recording:
+                if not self.settings.track_keyboard:
+                    self.recording_stats.filter('untracked_keys')
+                    return
                 try:
                     key_data = key.char if hasattr(key, 'char') else str(key)
                 except AttributeError:
                     key_data = str(key)
                     
-                self.actions.append({
-                    'type': 'key_press',
-                    'key': key_data,
-                    'time': current_time
-                })
+                self.recording_buffer.add_key_press(key_data)
+        elif self.recording:
+            self.recording_stats.filter('auto_repeat')
     
     def on_key_release(self, key):
-        try:
-            key_char = key.char
-        except AttributeError:
-            key_char = str(key).replace('Key.', '')
-            
-        if self.recording and self.track_keyboard_var.isChecked() and key_char in self.active_keys:
-            current_time = time.time() - self.start_time
+        was_held = self.hotkeys.release(key)
+        if self.recording:
+            if not was_held:
+                self.recording_stats.filter('stray_releases')
+                return
+            if not self.settings.track_keyboard:
+                self.recording_stats.filter('untracked_keys')
+                return
             try:
                 key_data = key.char if hasattr(key, 'char') else str(key)
             except AttributeError:
                 key_data = str(key)
                 
-            self.actions.append({
-                'type': 'key_release',
-                'key': key_data,
-                'time': current_time
-            })
+            self.recording_buffer.add_key_release(key_data)
+            
+    def update_hotkeys(self):
+        bindings = {}
+        bound = []
+        for name in FileHandler.favorite_names():
+            info = FileHandler.favorite_info(name) or {}
+            if info.get('hotkey'):
+                bindings[info['hotkey']] = lambda name=name: self.replay_favorite_hotkey(name)
+                bound.append(name)
+        # toggle_recording starts Qt timers, which only the GUI thread may do
+        bindings[self.record_shortcut] = self.record_hotkey_pressed.emit
+        bindings[self.replay_shortcut] = self.replay_macro
+        self.hotkeys.set_bindings(bindings)
+        
+        # Keep the bound macros compiled so a hotkey starts playing without disk access
+        self.hotkey_generation += 1
+        self.favorite_plans = {}
+        if bound:
+            threading.Thread(target=self.preload_favorites,
+                             args=(bound, self.hotkey_generation), daemon=True).start()
+        
+    def preload_favorites(self, names, generation):
+        plans = {}
+        for name in names:
+            plan = load_plan(name, *self.playback_options(name), backend=self.backend)
+            if plan is not None:
+                plans[name] = plan
+        if generation == self.hotkey_generation:
+            self.favorite_plans = plans
             
-        if key_char in self.active_keys:
-            self.active_keys.remove(key_char)
+    def replay_favorite_hotkey(self, name):
+        if self.is_replaying:
+            self.stop_replay()
+            return
+        if self.recording or self.saving_recording:
+            return
             
+        plan = self.favorite_plans.get(name)
+        if plan is None:
+            plan = load_plan(name, *self.playback_options(name), backend=self.backend)
+        if plan:
+            self.replay_actions(plan, name)
+        
+    def update_repeat_value(self):
+        mode = self.repeat_mode_input.currentData()
+        self.repeat_value_input.blockSignals(True)
+        if mode == 'count':
+            self.repeat_value_input.setValue(self.settings.repeat_count)
+        elif mode == 'duration':
+            self.repeat_value_input.setValue(self.settings.repeat_minutes)
+        self.repeat_value_input.blockSignals(False)
+        self.repeat_value_input.setEnabled(mode in ('count', 'duration'))
+        
+    def on_repeat_mode_changed(self):
+        self.settings.repeat_mode = self.repeat_mode_input.currentData()
+        self.update_repeat_value()
+        self.save_settings()
+        
+    def on_repeat_value_changed(self, value):
+        if self.settings.repeat_mode == 'count':
+            self.settings.repeat_count = value
+        elif self.settings.repeat_mode == 'duration':
+            self.settings.repeat_minutes = value
+        self.save_settings()
+        
+    def repeat_options(self):
+        """Return (iteration count, duration in seconds) for the replay engine."""
+        mode = self.settings.repeat_mode
+        if mode == 'count':
+            return self.settings.repeat_count, None
+        if mode == 'duration':
+            return 0, self.settings.repeat_minutes * 60
+        if mode == 'forever':
+            return 0, None
+        return 1, None
+        
     def replay_macro(self):
-        if self.recording or self.is_replaying:
+        if self.is_replaying:
+            self.stop_replay()
+            return
+        if self.recording or self.saving_recording:
             return
             
         if self.active_macro_name:
-            favorites = FileHandler.load_favorites()
-            if self.active_macro_name in favorites:
-                self.replay_actions(favorites[self.active_macro_name], self.active_macro_name)
+            plan = load_plan(self.active_macro_name, *self.playback_options(self.active_macro_name),
+                             backend=self.backend)
+            if plan is not None:
+                self.replay_actions(plan, self.active_macro_name)
                 return
         
-        actions = FileHandler.load_macro()
-        if actions:
-            self.replay_actions(actions)
+        plan = load_plan(None, *self.playback_options(), backend=self.backend)
+        if plan:
+            self.replay_actions(plan)
+            
+    def playback_options(self, macro_name=None):
+        """Return (speed, idle gap cap in seconds) for a favorite or the last recording."""
+        speed = self.settings.replay_speed
+        idle_cap = self.settings.idle_gap_cap
+        if macro_name:
+            info = FileHandler.favorite_info(macro_name) or {}
+            speed = info.get('speed', speed)
+            idle_cap = info.get('idle_cap', idle_cap)
+        return speed, idle_cap / 1000
             
-    def replay_actions(self, actions, macro_name=None):
+    def replay_actions(self, plan, macro_name=None):
         if self.is_replaying:
             QMessageBox.warning(self, "Warning", "A macro is currently playing!")
             return
             
         self.is_replaying = True
-        self.actions = actions
         if macro_name:
             self.active_macro_name = macro_name
             self.active_macro_label.setText(f"Active Macro: {macro_name}")
             
-        self.replay_thread = ReplayThread(actions, self.mouse, self.keyboard)
+        count, duration = self.repeat_options()
+        self.iteration_times = []
+        timing_file = FileHandler.TIMING_FILE if self.settings.dump_replay_timing else None
+        self.replay_thread = ReplayThread(plan, self.backend, count, duration, timing_file)
         self.replay_thread.status_update.connect(self.update_status)
+        self.replay_thread.iteration_finished.connect(self.on_iteration_finished)
         self.replay_thread.finished.connect(self.on_replay_finished)
         self.replay_thread.start()
         self.status_label.setText("Playing...\nPlease wait")
         
+    def stop_replay(self):
+        if self.is_replaying:
+            self.replay_thread.stop()
+            
+    def on_iteration_finished(self, iteration, seconds):
+        self.iteration_times.append(seconds)
+        if self.replay_thread.count == 1:
+            return
+        count = self.replay_thread.count
+        average = sum(self.iteration_times) / len(self.iteration_times)
+        status_text = f"Playing... iteration {iteration}" + (f"/{count}" if count else "") + "\n"
+        status_text += f"Last {seconds:.2f} s, avg {average:.2f} s\n"
+        status_text += f"Press '{self.replay_shortcut.upper()}' to stop"
+        self.status_label.setText(status_text)
+        
     def on_replay_finished(self):
         self.is_replaying = False
+        info = self.replay_thread.timing.summary()
+        if len(self.iteration_times) > 1:
+            info = f"{len(self.iteration_times)} iterations in {sum(self.iteration_times):.1f} s\n" + info
+        self.info_label.setText(info)
         self.update_shortcut_status()
         
     def add_to_favorites(self):
-        if not os.path.exists(FileHandler.MACRO_FILE):
+        if self.saving_recording:
+            QMessageBox.warning(self, "Warning", "The recording is still being saved!")
+            return
+        if not FileHandler.has_macro():
             QMessageBox.warning(self, "Warning", "No recorded macro found!")
             return
             
@@ -377,8 +666,10 @@ class MacroRecorder(QMainWindow):
         if dialog.exec() == QDialog.DialogCode.Accepted:
             name = dialog.textValue()
             if name:
-                macro = FileHandler.load_macro()
+                macro = macro_cache.columns()
                 if FileHandler.save_favorite(name, macro):
+                    macro_cache.put(name, macro)
+                    self.update_hotkeys()
                     QMessageBox.information(self, "Success", "Macro added to favorites!")
                     # Refresh favorites dialog if it's open
                     if self.favorites_dialog and self.favorites_dialog.isVisible():
@@ -411,11 +702,21 @@ class MacroRecorder(QMainWindow):
             status_text += f"Press '{self.replay_shortcut.upper()}' to play"
             self.status_label.setText(status_text)
             
+    def update_backend(self):
+        if self.backend is None or self.backend.name == self.settings.replay_backend or self.is_replaying:
+            return
+        self.backend.close()
+        self.backend = create_backend(self.settings.replay_backend)
+        
     def save_settings(self):
         self.settings.track_mouse = self.track_mouse_var.isChecked()
         self.settings.track_keyboard = self.track_keyboard_var.isChecked()
         self.settings.track_scroll = self.track_scroll_var.isChecked()
+        self.settings.ignore_app_clicks = self.ignore_app_clicks_var.isChecked()
         self.settings.record_key = self.record_shortcut
         self.settings.replay_key = self.replay_shortcut
         self.settings.save()
+        self.update_backend()
+        self.update_hotkeys()
+        self.update_exclusion_zones()
         self.update_shortcut_status() 
\ No newline at end of file
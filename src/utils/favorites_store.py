@@ -0,0 +1,163 @@
+import json
+import os
+import threading
+
+from utils import macro_codec
+
+def write_atomic(path, data):
+    """Write bytes to ``path`` via a temporary file so readers never see partial data."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+class FavoritesStore:
+    """Favorite macros stored one file per macro, indexed by a small manifest.
+
+    The cached manifest is shared by the GUI and background threads, so
+    every access to it holds ``_lock``.
+    """
+    MANIFEST_FILE = 'index.json'
+    MANIFEST_VERSION = 1
+
+    def __init__(self, root, legacy_file=None):
+        self.root = root
+        self.legacy_file = legacy_file
+        self._manifest = None
+        self._manifest_stamp = None
+        self._lock = threading.RLock()
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.root, self.MANIFEST_FILE)
+
+    def entry_path(self, entry):
+        return os.path.join(self.root, entry['file'])
+
+    def _stat_manifest(self):
+        try:
+            stat = os.stat(self.manifest_path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _read_manifest(self):
+        stamp = self._stat_manifest()
+        if stamp is None:
+            if self.legacy_file and os.path.exists(self.legacy_file):
+                self._import_legacy()
+                return self._manifest
+            self._manifest = {'version': self.MANIFEST_VERSION, 'next_id': 1, 'favorites': {}}
+            self._manifest_stamp = None
+        elif stamp != self._manifest_stamp:
+            with open(self.manifest_path, 'r') as f:
+                self._manifest = json.load(f)
+            self._manifest_stamp = stamp
+        return self._manifest
+
+    def _write_manifest(self, manifest):
+        os.makedirs(self.root, exist_ok=True)
+        write_atomic(self.manifest_path, json.dumps(manifest).encode('utf-8'))
+        self._manifest = manifest
+        self._manifest_stamp = self._stat_manifest()
+
+    def _import_legacy(self):
+        """Convert a monolithic favorites JSON file into per-macro entries."""
+        with open(self.legacy_file, 'rb') as f:
+            legacy = json.load(f)
+        self._manifest = {'version': self.MANIFEST_VERSION, 'next_id': 1, 'favorites': {}}
+        for name, actions in legacy.items():
+            self._write_entry(self._manifest, name, macro_codec.MacroColumns.from_actions(actions))
+        self._write_manifest(self._manifest)
+
+    def _write_entry(self, manifest, name, columns):
+        entry = manifest['favorites'].get(name)
+        if entry is None:
+            entry = {'file': f"{manifest['next_id']:06d}.tmc"}
+            manifest['next_id'] += 1
+        else:
+            entry = dict(entry)
+        os.makedirs(self.root, exist_ok=True)
+        write_atomic(self.entry_path(entry), macro_codec.encode(columns))
+        entry['events'] = len(columns)
+        entry['duration'] = columns.time[-1] if len(columns) else 0
+        manifest['favorites'][name] = entry
+        return entry
+
+    def names(self):
+        """Return favorite names in insertion order."""
+        with self._lock:
+            return list(self._read_manifest()['favorites'])
+
+    def __contains__(self, name):
+        with self._lock:
+            return name in self._read_manifest()['favorites']
+
+    def info(self, name):
+        """Return the manifest entry of a favorite, or None."""
+        with self._lock:
+            entry = self._read_manifest()['favorites'].get(name)
+            return dict(entry) if entry is not None else None
+
+    def update_info(self, name, **fields):
+        """Update metadata of a favorite without rewriting its macro."""
+        with self._lock:
+            manifest = self._read_manifest()
+            if name not in manifest['favorites']:
+                return False
+            favorites = dict(manifest['favorites'])
+            favorites[name] = dict(favorites[name], **fields)
+            self._write_manifest(dict(manifest, favorites=favorites))
+            return True
+
+    def path(self, name):
+        """Return the path of a favorite's macro file, or None."""
+        with self._lock:
+            entry = self._read_manifest()['favorites'].get(name)
+            return self.entry_path(entry) if entry is not None else None
+
+    def stamp(self, name):
+        """Return a value that changes whenever the stored favorite changes."""
+        with self._lock:
+            entry = self._read_manifest()['favorites'].get(name)
+            if entry is None:
+                return None
+            try:
+                stat = os.stat(self.entry_path(entry))
+            except FileNotFoundError:
+                return None
+            return (entry['file'], stat.st_mtime_ns, stat.st_size)
+
+    def load(self, name):
+        """Load a single favorite as macro columns, or None if it does not exist."""
+        with self._lock:
+            entry = self._read_manifest()['favorites'].get(name)
+        if entry is None:
+            return None
+        with open(self.entry_path(entry), 'rb') as f:
+            return macro_codec.loads(f.read())
+
+    def save(self, name, actions):
+        """Add or replace a single favorite."""
+        if not isinstance(actions, macro_codec.MacroColumns):
+            actions = macro_codec.MacroColumns.from_actions(actions)
+        with self._lock:
+            manifest = self._read_manifest()
+            manifest = dict(manifest, favorites=dict(manifest['favorites']))
+            self._write_entry(manifest, name, actions)
+            self._write_manifest(manifest)
+
+    def delete(self, name):
+        """Remove a single favorite. Returns False if it does not exist."""
+        with self._lock:
+            manifest = self._read_manifest()
+            if name not in manifest['favorites']:
+                return False
+            favorites = dict(manifest['favorites'])
+            entry = favorites.pop(name)
+            self._write_manifest(dict(manifest, favorites=favorites))
+            try:
+                os.remove(self.entry_path(entry))
+            except FileNotFoundError:
+                pass
+            return True
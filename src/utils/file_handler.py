@@ -1,57 +1,137 @@
-import json
 import os
 
+from utils import macro_codec
+from utils.favorites_store import FavoritesStore
+
 class FileHandler:
-    MACRO_FILE = 'macro.json'
+    MACRO_FILE = 'macro.tmc'
+    LEGACY_MACRO_FILE = 'macro.json'
+    JOURNAL_FILE = 'macro.journal'
+    TIMING_FILE = 'replay_timing.json'
+    RECORDING_REPORT_FILE = 'recording_report.json'
     FAVORITES_FILE = 'favorite_macros.json'
+    FAVORITES_DIR = 'favorite_macros'
+    _favorites_store = None
     
     @classmethod
     def save_macro(cls, actions):
         """Save the current macro to file."""
         if actions:
-            with open(cls.MACRO_FILE, 'w') as f:
-                json.dump(actions, f)
+            with open(cls.MACRO_FILE, 'wb') as f:
+                f.write(macro_codec.encode(actions))
                 
     @classmethod
-    def load_macro(cls):
-        """Load the current macro from file."""
-        if os.path.exists(cls.MACRO_FILE):
-            with open(cls.MACRO_FILE, 'r') as f:
-                return json.load(f)
-        return []
+    def save_macro_blocks(cls, blocks):
+        """Save the current macro from consecutive blocks of columns, one chunk in memory at a time.
+
+        Returns the number of events saved; nothing is written for an empty macro.
+        """
+        writer = macro_codec.ChunkWriter(cls.MACRO_FILE)
+        try:
+            for block in blocks:
+                writer.write(block)
+        except BaseException:
+            writer.discard()
+            raise
+        if not writer.count:
+            writer.discard()
+            return 0
+        writer.close()
+        return writer.count
+                
+    @classmethod
+    def load_macro_columns(cls):
+        """Load the current macro as columns, falling back to the legacy JSON file."""
+        for path in (cls.MACRO_FILE, cls.LEGACY_MACRO_FILE):
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    return macro_codec.loads(f.read())
+        return None
+    
+    @classmethod
+    def macro_path(cls):
+        """Return the path of the stored current macro, or None."""
+        for path in (cls.MACRO_FILE, cls.LEGACY_MACRO_FILE):
+            if os.path.exists(path):
+                return path
+        return None
+    
+    @classmethod
+    def macro_stamp(cls):
+        """Return a value that changes whenever the current macro file changes."""
+        for path in (cls.MACRO_FILE, cls.LEGACY_MACRO_FILE):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            return (path, stat.st_mtime_ns, stat.st_size)
+        return None
+    
+    @classmethod
+    def has_macro(cls):
+        """Check whether a recorded macro exists."""
+        return os.path.exists(cls.MACRO_FILE) or os.path.exists(cls.LEGACY_MACRO_FILE)
+    
+    @classmethod
+    def favorites_store(cls):
+        """Return the per-entry favorites store, importing the legacy file on first use."""
+        if cls._favorites_store is None:
+            cls._favorites_store = FavoritesStore(cls.FAVORITES_DIR, cls.FAVORITES_FILE)
+        return cls._favorites_store
     
     @classmethod
     def save_favorite(cls, name, actions):
         """Save a macro to favorites."""
         try:
-            favorites = cls.load_favorites()
-            favorites[name] = actions
-            with open(cls.FAVORITES_FILE, 'w') as f:
-                json.dump(favorites, f)
+            cls.favorites_store().save(name, actions)
             return True
         except Exception as e:
             print(f"Error saving favorite: {str(e)}")
             return False
             
     @classmethod
-    def load_favorites(cls):
-        """Load all favorite macros."""
+    def load_favorite(cls, name):
+        """Load a single favorite macro as columns, or None if it does not exist."""
         try:
-            with open(cls.FAVORITES_FILE, 'r') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            return {}
+            return cls.favorites_store().load(name)
+        except (OSError, ValueError) as e:
+            print(f"Error loading favorite: {str(e)}")
+            return None
+    
+    @classmethod
+    def favorite_info(cls, name):
+        """Return the stored metadata of a favorite, or None."""
+        return cls.favorites_store().info(name)
+    
+    @classmethod
+    def update_favorite_info(cls, name, **fields):
+        """Store metadata such as playback options for a favorite."""
+        try:
+            return cls.favorites_store().update_info(name, **fields)
+        except Exception as e:
+            print(f"Error updating favorite: {str(e)}")
+            return False
+    
+    @classmethod
+    def favorite_path(cls, name):
+        """Return the path of a favorite's macro file, or None."""
+        return cls.favorites_store().path(name)
+    
+    @classmethod
+    def favorite_stamp(cls, name):
+        """Return a value that changes whenever the stored favorite changes."""
+        return cls.favorites_store().stamp(name)
+    
+    @classmethod
+    def favorite_names(cls):
+        """List the names of all favorite macros."""
+        return cls.favorites_store().names()
             
     @classmethod
     def delete_favorite(cls, name):
         """Delete a favorite macro."""
         try:
-            favorites = cls.load_favorites()
-            if name in favorites:
-                del favorites[name]
-                with open(cls.FAVORITES_FILE, 'w') as f:
-                    json.dump(favorites, f)
-                return True
+            return cls.favorites_store().delete(name)
         except Exception as e:
             print(f"Error deleting favorite: {str(e)}")
-        return False 
\ No newline at end of file
+        return False
\ No newline at end of file
@@ -0,0 +1,84 @@
+# Left/right variants of modifiers trigger the same bindings
+MODIFIER_ALIASES = {
+    'ctrl_l': 'ctrl',
+    'ctrl_r': 'ctrl',
+    'shift_l': 'shift',
+    'shift_r': 'shift',
+    'alt_l': 'alt',
+    'alt_r': 'alt',
+    'cmd_l': 'cmd',
+    'cmd_r': 'cmd',
+}
+
+def normalize_key_name(name):
+    """Normalize a key name as written in a shortcut string such as 'ctrl+s'."""
+    name = name.strip().lower()
+    if name.startswith('key.'):
+        name = name[4:]
+    return MODIFIER_ALIASES.get(name, name)
+
+def key_code(key):
+    """Return the normalized name of a pynput key object."""
+    char = getattr(key, 'char', None)
+    if char:
+        # With ctrl held some platforms report control characters, e.g. '\x13' for ctrl+s
+        if len(char) == 1 and ord(char) < 32:
+            char = chr(ord(char) + 96)
+        return char.lower()
+    name = getattr(key, 'name', None)
+    if name:
+        return MODIFIER_ALIASES.get(name, name)
+    vk = getattr(key, 'vk', None)
+    if vk is not None:
+        return f"<{vk}>"
+    return normalize_key_name(str(key))
+
+def parse_chord(text):
+    """Parse a shortcut string such as 'ctrl+shift+s' into a chord."""
+    return frozenset(normalize_key_name(part) for part in text.split('+') if part.strip())
+
+def format_chord(chord):
+    return '+'.join(sorted(chord))
+
+class ChordMatcher:
+    """Match the currently held keys against a table of chords.
+
+    Bindings are keyed by frozensets of normalized key names, so each key
+    press costs one set insert and one dict lookup however many bindings
+    are registered.
+    """
+
+    def __init__(self):
+        self.bindings = {}
+        self.active_keys = set()
+
+    def set_bindings(self, bindings):
+        """Replace all bindings at once with a {shortcut string: callback} mapping."""
+        table = {}
+        for shortcut, callback in bindings.items():
+            chord = parse_chord(shortcut) if isinstance(shortcut, str) else shortcut
+            if chord:
+                table[chord] = callback
+        # Listener threads keep matching against the old table until this swap
+        self.bindings = table
+
+    def press(self, key):
+        """Register a key press.
+
+        Returns (is_new, callback): ``is_new`` is False for auto-repeat of a
+        key that is already held, ``callback`` is the binding completed by
+        this press, if any.
+        """
+        code = key_code(key)
+        if code in self.active_keys:
+            return False, None
+        self.active_keys.add(code)
+        return True, self.bindings.get(frozenset(self.active_keys))
+
+    def release(self, key):
+        """Register a key release. Returns False if the key was not held."""
+        code = key_code(key)
+        if code in self.active_keys:
+            self.active_keys.discard(code)
+            return True
+        return False
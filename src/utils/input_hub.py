@@ -0,0 +1,83 @@
+import threading
+from functools import partial
+
+from pynput import keyboard, mouse
+
+class InputHub:
+    """Share a single OS input hook of one device between several consumers.
+
+    Consumers subscribe with the listener callbacks they need, e.g.
+    ``on_press=...``. The hook only runs while someone is subscribed. Each
+    event is passed to the subscribers in order; a callback returning True
+    consumes the event so later subscribers do not see it.
+    """
+
+    def __init__(self, listener_class, events):
+        self.listener_class = listener_class
+        self.events = events
+        self.listener = None
+        self._subscribers = ()
+        self._handlers = {event: () for event in events}
+        self._lock = threading.Lock()
+
+    def subscribe(self, first=False, **callbacks):
+        """Register callbacks and return a token for unsubscribe().
+
+        ``first`` puts the subscriber ahead of the existing ones, which lets
+        a key capture consume events before the global hotkeys see them.
+        """
+        unknown = set(callbacks) - set(self.events)
+        if unknown:
+            raise ValueError(f"Unknown input events: {', '.join(sorted(unknown))}")
+        token = object()
+        with self._lock:
+            subscriber = (token, callbacks)
+            if first:
+                self._subscribers = (subscriber,) + self._subscribers
+            else:
+                self._subscribers = self._subscribers + (subscriber,)
+            self._update()
+        return token
+
+    def unsubscribe(self, token):
+        with self._lock:
+            self._subscribers = tuple(s for s in self._subscribers if s[0] is not token)
+            self._update()
+
+    def _update(self):
+        # Handler tables are swapped as a whole, the hook thread never sees a partial update
+        self._handlers = {
+            event: tuple(callbacks[event] for _, callbacks in self._subscribers if event in callbacks)
+            for event in self.events
+        }
+        if self.listener is not None and not self.listener.is_alive():
+            # The hook thread died, start a new one for the remaining subscribers
+            self.listener = None
+        if self._subscribers and self.listener is None:
+            self.listener = self.listener_class(
+                **{event: partial(self._dispatch, event) for event in self.events}
+            )
+            self.listener.start()
+        elif not self._subscribers and self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def _dispatch(self, event, *args):
+        for handler in self._handlers[event]:
+            # pynput stops a listener whose callback raises, which would end
+            # input for every subscriber, so a failing handler is only logged
+            try:
+                consumed = handler(*args)
+            except Exception as e:
+                print(f"Error in {event} input handler: {str(e)}")
+                continue
+            if consumed:
+                break
+        # Never return the handler result, pynput stops a listener whose callback returns False
+
+    @property
+    def running(self):
+        return self.listener is not None and self.listener.is_alive()
+
+keyboard_hub = InputHub(keyboard.Listener, ('on_press', 'on_release'))
+mouse_hub = InputHub(mouse.Listener, ('on_move', 'on_click', 'on_scroll'))
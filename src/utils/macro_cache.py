@@ -0,0 +1,225 @@
+import threading
+from collections import OrderedDict
+
+from utils import macro_codec
+from utils.file_handler import FileHandler
+from utils.replay_plan import compile_plan, TimeWarp, PlanStream
+
+# Macros with more events than this are streamed from disk during replay
+STREAM_THRESHOLD = 200000
+
+# Approximate memory cost of one compiled replay operation
+PLAN_EVENT_BYTES = 25
+
+class CacheEntry:
+    """Parsed columns of one macro file and the plans compiled from them."""
+
+    def __init__(self, stamp, columns):
+        self.stamp = stamp
+        self.columns = columns
+        self.count = len(columns)
+        self.plans = {}
+        self.size = sum(len(getattr(columns, name)) * getattr(columns, name).itemsize
+                        for name, _ in columns.COLUMNS)
+
+    def add_plan(self, key, plan):
+        self.plans[key] = plan
+        self.size += len(plan) * PLAN_EVENT_BYTES
+
+class MacroCache:
+    """Process-wide cache of parsed and compiled macros.
+
+    Entries are keyed by favorite name (None for the last recording) and
+    validated against the file's mtime and size on every lookup, so a macro
+    changed on disk is reloaded while repeat plays skip disk and parsing.
+    The least recently used entries are evicted once the cached columns and
+    plans exceed ``budget`` bytes.
+    """
+    BUDGET = 256 * 1024 * 1024
+
+    def __init__(self, budget=BUDGET):
+        self.budget = budget
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading = {}
+        # (stamp, event count) of macros read without an entry, e.g. streamed ones
+        self._counts = {}
+
+    def _stamp(self, name):
+        return FileHandler.favorite_stamp(name) if name else FileHandler.macro_stamp()
+
+    def _path(self, name):
+        return FileHandler.favorite_path(name) if name else FileHandler.macro_path()
+
+    def _lookup(self, name, stamp):
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                return None
+            if entry.stamp != stamp:
+                self._remove(name)
+                return None
+            self._entries.move_to_end(name)
+            return entry
+
+    def _remove(self, name):
+        entry = self._entries.pop(name, None)
+        if entry is not None:
+            self.size -= entry.size
+
+    def _store(self, name, entry):
+        with self._lock:
+            self._remove(name)
+            if entry.size > self.budget:
+                return
+            self._entries[name] = entry
+            self.size += entry.size
+            self._evict()
+
+    def _plan(self, entry, key):
+        with self._lock:
+            return entry.plans.get(key)
+
+    def _add_plan(self, name, entry, key, plan):
+        """Attach a plan compiled outside the lock, unless another thread added one first.
+
+        Returns the plan the entry holds for ``key``.
+        """
+        with self._lock:
+            existing = entry.plans.get(key)
+            if existing is not None:
+                return existing
+            entry.add_plan(key, plan)
+            if self._entries.get(name) is entry:
+                self.size += len(plan) * PLAN_EVENT_BYTES
+                self._evict()
+            return plan
+
+    def _evict(self):
+        while self.size > self.budget and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= evicted.size
+
+    def _event_count(self, name, stamp):
+        """Return the event count of a macro, reading its file header once per stamp."""
+        with self._lock:
+            known = self._counts.get(name)
+        if known is not None and known[0] == stamp:
+            return known[1]
+        path = self._path(name)
+        count = (macro_codec.event_count(path) or 0) if path else 0
+        with self._lock:
+            self._counts[name] = (stamp, count)
+        return count
+
+    def _entry(self, name, stamp=None):
+        if stamp is None:
+            stamp = self._stamp(name)
+            if stamp is None:
+                self.invalidate(name)
+                return None
+        entry = self._lookup(name, stamp)
+        if entry is not None:
+            return entry
+
+        # Concurrent misses for the same macro wait for a single load
+        with self._lock:
+            loading = self._loading.setdefault(name, threading.Lock())
+        with loading:
+            entry = self._lookup(name, stamp)
+            if entry is not None:
+                return entry
+            columns = FileHandler.load_favorite(name) if name else FileHandler.load_macro_columns()
+            if columns is None:
+                return None
+            entry = CacheEntry(stamp, columns)
+            self._store(name, entry)
+            return entry
+
+    def columns(self, macro_name=None):
+        """Return the parsed columns of a favorite or the last recording, or None."""
+        entry = self._entry(macro_name)
+        return entry.columns if entry is not None else None
+
+    def plan(self, macro_name=None, speed=1.0, idle_cap=0.0, backend=None):
+        """Return the compiled plan of a favorite or the last recording, or None.
+
+        ``speed`` and ``idle_cap`` (seconds) warp the timeline of the returned plan,
+        which is resolved for the replay ``backend`` (pynput if None).
+        Macros longer than STREAM_THRESHOLD events are returned as a PlanStream
+        that decodes the file during playback instead of being cached.
+        """
+        stamp = self._stamp(macro_name)
+        if stamp is None:
+            self.invalidate(macro_name)
+            return None
+        entry = self._lookup(macro_name, stamp)
+        count = entry.count if entry is not None else self._event_count(macro_name, stamp)
+        if count > STREAM_THRESHOLD:
+            path = self._path(macro_name)
+            return PlanStream(path, speed, idle_cap, backend) if path else None
+
+        if entry is None:
+            entry = self._entry(macro_name, stamp)
+            if entry is None:
+                return None
+        # Plans hold buttons and keys resolved for one backend
+        backend_name = backend.name if backend else None
+        warp = TimeWarp(speed, idle_cap)
+        key = (backend_name, warp.speed, warp.idle_cap)
+        plan = self._plan(entry, key)
+        if plan is not None:
+            return plan
+
+        # Plans are compiled outside the lock; a plan another thread
+        # compiled meanwhile wins and this one is dropped
+        base_key = (backend_name, 1.0, 0.0)
+        base = self._plan(entry, base_key)
+        if base is None:
+            base = self._add_plan(macro_name, entry, base_key, compile_plan(entry.columns, backend))
+        if warp.is_identity:
+            return base
+        return self._add_plan(macro_name, entry, key, base.warped(warp))
+
+    def put(self, macro_name, columns):
+        """Seed the cache with columns that were just written for ``macro_name``."""
+        stamp = self._stamp(macro_name)
+        if stamp is not None and columns is not None:
+            self._store(macro_name, CacheEntry(stamp, columns))
+
+    def invalidate(self, macro_name=None):
+        with self._lock:
+            self._remove(macro_name)
+            self._counts.pop(macro_name, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._counts.clear()
+            self.size = 0
+
+    def warm(self, names, options=None, backend=None):
+        """Compile the given macros into the cache until the budget is reached.
+
+        ``options(name)`` returns the (speed, idle_cap) each macro is played with.
+        """
+        for name in names:
+            if self.size >= self.budget:
+                break
+            try:
+                self.plan(name, *(options(name) if options else ()), backend=backend)
+            except (OSError, ValueError) as e:
+                print(f"Error preloading macro: {str(e)}")
+
+    def warm_async(self, names, options=None, backend=None):
+        """Warm the cache on a background thread."""
+        thread = threading.Thread(target=self.warm, args=(list(names), options, backend), daemon=True)
+        thread.start()
+        return thread
+
+macro_cache = MacroCache()
+
+def load_plan(macro_name=None, speed=1.0, idle_cap=0.0, backend=None):
+    """Load and compile the current macro or a favorite, reusing cached plans."""
+    return macro_cache.plan(macro_name, speed, idle_cap, backend)
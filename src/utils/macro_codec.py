@@ -0,0 +1,527 @@
+import array
+import json
+import operator
+import os
+import struct
+import sys
+import tempfile
+import zlib
+from itertools import accumulate
+
+# Event type codes used in the type column
+MOVE = 0
+CLICK = 1
+SCROLL = 2
+KEY_PRESS = 3
+KEY_RELEASE = 4
+
+TYPE_NAMES = ('move', 'click', 'scroll', 'key_press', 'key_release')
+TYPE_CODES = {name: code for code, name in enumerate(TYPE_NAMES)}
+
+# Key column value for events without a button/key
+NO_KEY = 0xFFFF
+
+MAGIC = b'TTMC'
+VERSION = 2
+VERSIONS = (1, 2)
+HEADER = struct.Struct('<4sHHII')
+KEY_LENGTH = struct.Struct('<H')
+
+# Version 2 stores the events in zlib compressed chunks of CHUNK_EVENTS
+# events, listed in a chunk table so each chunk can be decoded on its own
+CHUNK_EVENTS = 4096
+CHUNK_TABLE = struct.Struct('<II')
+CHUNK_LENGTH = struct.Struct('<I')
+COMPRESS_LEVEL = 6
+# Reference value and byte width of a packed column; a negative width
+# means the values are stored as signed integers
+FRAME = struct.Struct('<qb')
+# Columns whose values are stored as differences to the previous event
+DELTA_COLUMNS = ('time', 'x', 'y')
+NS_PER_SECOND = 1e9
+WIDTH_TYPECODES = {array.array(typecode).itemsize: typecode for typecode in 'QLIHB'}
+WIDTH_TYPECODES.update({-array.array(typecode).itemsize: typecode for typecode in 'qlihb'})
+
+class MacroColumns:
+    """Column-oriented storage for the events of a macro."""
+    COLUMNS = (
+        ('time', 'd'),
+        ('type', 'B'),
+        ('pressed', 'B'),
+        ('x', 'i'),
+        ('y', 'i'),
+        ('dx', 'i'),
+        ('dy', 'i'),
+        ('key', 'H'),
+    )
+
+    def __init__(self, keys=None):
+        for name, typecode in self.COLUMNS:
+            setattr(self, name, array.array(typecode))
+        self.keys = list(keys or [])
+        self._key_ids = {key: index for index, key in enumerate(self.keys)}
+
+    def __len__(self):
+        return len(self.time)
+
+    def key_id(self, key):
+        """Return the interned id of a button/key name."""
+        if key is None:
+            return NO_KEY
+        key_id = self._key_ids.get(key)
+        if key_id is None:
+            key_id = len(self.keys)
+            self.keys.append(key)
+            self._key_ids[key] = key_id
+        return key_id
+
+    def append(self, event_type, time, x=0, y=0, dx=0, dy=0, key=NO_KEY, pressed=0):
+        """Append a single event using an already interned key id."""
+        self.time.append(time)
+        self.type.append(event_type)
+        self.pressed.append(pressed)
+        self.x.append(x)
+        self.y.append(y)
+        self.dx.append(dx)
+        self.dy.append(dy)
+        self.key.append(key)
+
+    def append_action(self, action):
+        """Append an event given in the dict format used by the recorder."""
+        event_type = TYPE_CODES.get(action.get('type'))
+        if event_type is None:
+            return
+        key = action.get('button') if event_type == CLICK else action.get('key')
+        self.append(
+            event_type,
+            float(action.get('time', 0)),
+            int(round(action.get('x', 0))),
+            int(round(action.get('y', 0))),
+            int(action.get('dx', 0)),
+            int(action.get('dy', 0)),
+            self.key_id(key) if event_type in (CLICK, KEY_PRESS, KEY_RELEASE) else NO_KEY,
+            1 if action.get('pressed') else 0
+        )
+
+    def action(self, index):
+        """Return event ``index`` in the dict format used by the recorder."""
+        event_type = self.type[index]
+        action = {'type': TYPE_NAMES[event_type]}
+        if event_type == MOVE:
+            action['x'] = self.x[index]
+            action['y'] = self.y[index]
+        elif event_type == CLICK:
+            action['x'] = self.x[index]
+            action['y'] = self.y[index]
+            action['button'] = self._key_name(self.key[index])
+            action['pressed'] = bool(self.pressed[index])
+        elif event_type == SCROLL:
+            action['x'] = self.x[index]
+            action['y'] = self.y[index]
+            action['dx'] = self.dx[index]
+            action['dy'] = self.dy[index]
+        else:
+            action['key'] = self._key_name(self.key[index])
+        action['time'] = self.time[index]
+        return action
+
+    def to_actions(self):
+        """Convert the columns back to a list of action dicts."""
+        return [self.action(index) for index in range(len(self))]
+
+    def extend(self, other):
+        """Append the events of ``other``, whose key ids must refer to this key table."""
+        for name, _ in self.COLUMNS:
+            getattr(self, name).extend(getattr(other, name))
+
+    def slice(self, start, end=None):
+        """Return events ``start`` to ``end`` as columns sharing this key table."""
+        part = chunk_columns(self.keys, self._key_ids)
+        for name, _ in self.COLUMNS:
+            setattr(part, name, getattr(self, name)[start:end])
+        return part
+
+    def _key_name(self, key_id):
+        return None if key_id == NO_KEY else self.keys[key_id]
+
+    @classmethod
+    def from_actions(cls, actions):
+        """Build columns from a list of action dicts."""
+        columns = cls()
+        for action in actions:
+            columns.append_action(action)
+        return columns
+
+def column_bytes(column):
+    if sys.byteorder == 'big' and column.itemsize > 1:
+        column = array.array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+def key_table_bytes(keys):
+    parts = []
+    for key in keys:
+        data = key.encode('utf-8')
+        parts.append(KEY_LENGTH.pack(len(data)))
+        parts.append(data)
+    return b''.join(parts)
+
+def pack_width(low, high):
+    """Return the smallest width code whose integers hold ``low`` to ``high``."""
+    for width in (1, 2, 4, 8):
+        bits = 8 * width
+        if low >= 0 and high < 1 << bits:
+            return width
+        if -(1 << (bits - 1)) <= low and high < 1 << (bits - 1):
+            return -width
+    raise ValueError("Macro value out of range")
+
+def pack_column(values, delta=False):
+    """Pack a column of integers in the fewest bytes that hold them.
+
+    With ``delta`` the first value is the reference and the differences
+    between consecutive values are packed after it; a column that does not
+    change takes no bytes. Otherwise a constant column is stored as just
+    its reference. Values are stored as they are, signed if any is negative,
+    so decoding is a copy plus the running sum of a delta column.
+    """
+    if not len(values):
+        return FRAME.pack(0, 0)
+    reference = values[0]
+    if delta:
+        values = list(map(operator.sub, values[1:], values))
+        constant = not any(values)
+    else:
+        constant = min(values) == max(values)
+    if constant:
+        return FRAME.pack(reference, 0)
+    width = pack_width(min(values), max(values))
+    packed = array.array(WIDTH_TYPECODES[width], values)
+    return FRAME.pack(reference, width) + column_bytes(packed)
+
+def unpack_column(view, offset, count, delta=False, typecode='q'):
+    """Unpack a column written by pack_column().
+
+    Returns the values and the offset after the column. The values are an
+    array if they are stored with ``typecode``, otherwise a list, so either
+    fills a column in one call.
+    """
+    reference, width = FRAME.unpack_from(view, offset)
+    offset += FRAME.size
+    if not width:
+        return array.array(typecode, [reference]) * count, offset
+    values = array.array(WIDTH_TYPECODES[width])
+    size = (count - 1 if delta else count) * values.itemsize
+    values.frombytes(view[offset:offset + size])
+    if sys.byteorder == 'big' and values.itemsize > 1:
+        values.byteswap()
+    offset += size
+    if delta:
+        return list(accumulate(values, initial=reference)), offset
+    if values.typecode != typecode:
+        values = values.tolist()
+    return values, offset
+
+def encode_chunk(columns, start, end):
+    """Encode events ``start`` to ``end`` as one compressed chunk."""
+    parts = []
+    for name, _ in MacroColumns.COLUMNS:
+        values = getattr(columns, name)[start:end]
+        if name == 'time':
+            # Whole nanoseconds, which is what the recorder measures
+            values = list(map(round, map(NS_PER_SECOND.__mul__, values)))
+        parts.append(pack_column(values, name in DELTA_COLUMNS))
+    return zlib.compress(b''.join(parts), COMPRESS_LEVEL)
+
+def decode_chunk(data, count, chunk):
+    """Decode a compressed chunk of ``count`` events into the columns of ``chunk``."""
+    try:
+        view = memoryview(zlib.decompress(data))
+        offset = 0
+        for name, typecode in MacroColumns.COLUMNS:
+            column = getattr(chunk, name)
+            if name == 'time':
+                values, offset = unpack_column(view, offset, count, True)
+                column.fromlist(list(map(NS_PER_SECOND.__rtruediv__, values)))
+                continue
+            values, offset = unpack_column(view, offset, count, name in DELTA_COLUMNS, typecode)
+            if isinstance(values, list):
+                column.fromlist(values)
+            else:
+                column.extend(values)
+    except (zlib.error, struct.error, KeyError):
+        raise ValueError("Corrupt macro chunk")
+    if offset != len(view):
+        raise ValueError("Corrupt macro chunk")
+
+def encode(columns, version=VERSION):
+    """Encode macro columns into the binary macro format.
+
+    Version 2 stores times in whole nanoseconds, so times read back are
+    rounded to the nearest nanosecond. Recorded times are whole nanoseconds
+    already and come back unchanged; only times from other sources, such as
+    JSON macros, can change in their last digits.
+    """
+    if not isinstance(columns, MacroColumns):
+        columns = MacroColumns.from_actions(columns)
+    count = len(columns)
+    parts = [HEADER.pack(MAGIC, version, 0, count, len(columns.keys)), key_table_bytes(columns.keys)]
+    if version == 1:
+        for name, _ in MacroColumns.COLUMNS:
+            parts.append(column_bytes(getattr(columns, name)))
+        return b''.join(parts)
+    if version != 2:
+        raise ValueError(f"Unsupported macro format version: {version}")
+
+    chunks = [encode_chunk(columns, start, start + CHUNK_EVENTS) for start in range(0, count, CHUNK_EVENTS)]
+    parts.append(CHUNK_TABLE.pack(CHUNK_EVENTS, len(chunks)))
+    parts.extend(CHUNK_LENGTH.pack(len(chunk)) for chunk in chunks)
+    parts.extend(chunks)
+    return b''.join(parts)
+
+class ChunkWriter:
+    """Write a version 2 macro file from consecutive blocks of columns.
+
+    Compressed chunks go to a temporary file until close() writes the
+    header, the key table and the chunk table in front of them, so only
+    one chunk of events is held in memory. The blocks must share one key
+    table, which may grow from block to block.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self.keys = []
+        self._lengths = []
+        self._chunks = tempfile.TemporaryFile()
+        self._pending = None
+
+    def write(self, columns):
+        if not len(columns):
+            return
+        self.keys = columns.keys
+        self.count += len(columns)
+        if self._pending is None:
+            self._pending = columns.slice(0, 0)
+        self._pending.extend(columns)
+        full = len(self._pending) - len(self._pending) % CHUNK_EVENTS
+        if full:
+            for start in range(0, full, CHUNK_EVENTS):
+                self._write_chunk(self._pending, start, start + CHUNK_EVENTS)
+            self._pending = self._pending.slice(full)
+
+    def _write_chunk(self, columns, start, end):
+        data = encode_chunk(columns, start, end)
+        self._chunks.write(data)
+        self._lengths.append(len(data))
+
+    def discard(self):
+        """Drop everything written so far and leave ``path`` alone."""
+        self._pending = None
+        self._chunks.close()
+
+    def close(self):
+        """Write the macro file, replacing ``path`` only once it is complete."""
+        if self._pending is not None and len(self._pending):
+            self._write_chunk(self._pending, 0, len(self._pending))
+        self._pending = None
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, 2, 0, self.count, len(self.keys)))
+            f.write(key_table_bytes(self.keys))
+            f.write(CHUNK_TABLE.pack(CHUNK_EVENTS, len(self._lengths)))
+            f.write(b''.join(CHUNK_LENGTH.pack(length) for length in self._lengths))
+            self._chunks.seek(0)
+            while True:
+                data = self._chunks.read(1 << 20)
+                if not data:
+                    break
+                f.write(data)
+        self._chunks.close()
+        os.replace(tmp_path, self.path)
+
+def read_key_table(view, offset, key_count):
+    """Read the interned key table starting at ``offset``."""
+    keys = []
+    for _ in range(key_count):
+        (length,) = KEY_LENGTH.unpack_from(view, offset)
+        offset += KEY_LENGTH.size
+        keys.append(bytes(view[offset:offset + length]).decode('utf-8'))
+        offset += length
+    return keys, offset
+
+def chunk_layout(offset, count, chunk_events, lengths):
+    """Return (offset, event count, compressed length) of each chunk."""
+    chunks = []
+    for index, length in enumerate(lengths):
+        chunks.append((offset, min(chunk_events, count - index * chunk_events), length))
+        offset += length
+    if sum(events for _, events, _ in chunks) != count:
+        raise ValueError("Corrupt macro chunk table")
+    return chunks
+
+def read_chunk_table(view, offset, count):
+    """Read the chunk table starting at ``offset`` and return the chunk layout."""
+    chunk_events, chunk_count = CHUNK_TABLE.unpack_from(view, offset)
+    offset += CHUNK_TABLE.size
+    lengths = [CHUNK_LENGTH.unpack_from(view, offset + index * CHUNK_LENGTH.size)[0]
+               for index in range(chunk_count)]
+    return chunk_layout(offset + chunk_count * CHUNK_LENGTH.size, count, chunk_events, lengths)
+
+def check_header(magic, version):
+    if magic != MAGIC:
+        raise ValueError("Not a TinyTask macro file")
+    if version not in VERSIONS:
+        raise ValueError(f"Unsupported macro format version: {version}")
+
+def decode(data):
+    """Decode the binary macro format into macro columns."""
+    view = memoryview(data)
+    try:
+        magic, version, _, count, key_count = HEADER.unpack_from(view, 0)
+        check_header(magic, version)
+        keys, offset = read_key_table(view, HEADER.size, key_count)
+        chunks = read_chunk_table(view, offset, count) if version == 2 else None
+    except struct.error:
+        raise ValueError("Truncated macro file")
+
+    columns = MacroColumns(keys)
+    if version == 2:
+        end = offset + CHUNK_TABLE.size
+        for chunk_offset, events, length in chunks:
+            end = chunk_offset + length
+            if end > len(view):
+                raise ValueError("Truncated macro file")
+            decode_chunk(view[chunk_offset:end], events, columns)
+        if end != len(view):
+            raise ValueError("Trailing data in macro file")
+        return columns
+
+    size = count * sum(array.array(typecode).itemsize for _, typecode in MacroColumns.COLUMNS)
+    if offset + size < len(view):
+        raise ValueError("Trailing data in macro file")
+    if offset + size > len(view):
+        raise ValueError("Truncated macro file")
+    for name, _ in MacroColumns.COLUMNS:
+        column = getattr(columns, name)
+        size = count * column.itemsize
+        column.frombytes(view[offset:offset + size])
+        if sys.byteorder == 'big' and column.itemsize > 1:
+            column.byteswap()
+        offset += size
+    return columns
+
+def read_header(f):
+    """Read the header and key table from an open binary macro file.
+
+    Returns (format version, event count, keys, offset after the key table).
+    """
+    try:
+        magic, version, _, count, key_count = HEADER.unpack(f.read(HEADER.size))
+        check_header(magic, version)
+        keys = []
+        for _ in range(key_count):
+            (length,) = KEY_LENGTH.unpack(f.read(KEY_LENGTH.size))
+            data = f.read(length)
+            if len(data) != length:
+                raise ValueError("Truncated macro file")
+            keys.append(data.decode('utf-8'))
+    except struct.error:
+        raise ValueError("Truncated macro file")
+    return version, count, keys, f.tell()
+
+def read_chunks(f, count, offset):
+    """Read the chunk table of an open version 2 macro file and return the chunk layout."""
+    f.seek(offset)
+    try:
+        chunk_events, chunk_count = CHUNK_TABLE.unpack(f.read(CHUNK_TABLE.size))
+    except struct.error:
+        raise ValueError("Truncated macro file")
+    lengths = array.array(WIDTH_TYPECODES[4])
+    lengths.frombytes(f.read(chunk_count * CHUNK_LENGTH.size))
+    if len(lengths) != chunk_count:
+        raise ValueError("Truncated macro file")
+    if sys.byteorder == 'big':
+        lengths.byteswap()
+    return chunk_layout(f.tell(), count, chunk_events, lengths)
+
+def chunk_columns(keys, key_ids):
+    """Return empty columns sharing one key table."""
+    chunk = MacroColumns()
+    chunk.keys = keys
+    chunk._key_ids = key_ids
+    return chunk
+
+def read_chunk(path, index):
+    """Decode only chunk ``index`` of a version 2 macro file."""
+    with open(path, 'rb') as f:
+        version, count, keys, offset = read_header(f)
+        if version != 2:
+            raise ValueError("Only version 2 macro files are chunked")
+        chunk_offset, events, length = read_chunks(f, count, offset)[index]
+        f.seek(chunk_offset)
+        chunk = MacroColumns(keys)
+        decode_chunk(f.read(length), events, chunk)
+        return chunk
+
+def iter_chunks(path, chunk_size=4096):
+    """Yield a binary macro file as consecutive column chunks of up to ``chunk_size`` events.
+
+    Only one chunk is held in memory at a time. All chunks share one key table.
+    """
+    with open(path, 'rb') as f:
+        version, count, keys, offset = read_header(f)
+        key_ids = {key: index for index, key in enumerate(keys)}
+        if version == 2:
+            for chunk_offset, events, length in read_chunks(f, count, offset):
+                f.seek(chunk_offset)
+                data = f.read(length)
+                if len(data) != length:
+                    raise ValueError("Truncated macro file")
+                chunk = chunk_columns(keys, key_ids)
+                decode_chunk(data, events, chunk)
+                if events <= chunk_size:
+                    yield chunk
+                    continue
+                for start in range(0, events, chunk_size):
+                    part = chunk_columns(keys, key_ids)
+                    for name, _ in MacroColumns.COLUMNS:
+                        setattr(part, name, getattr(chunk, name)[start:start + chunk_size])
+                    yield part
+            return
+
+        column_offsets = []
+        for name, typecode in MacroColumns.COLUMNS:
+            column_offsets.append(offset)
+            offset += count * array.array(typecode).itemsize
+
+        for start in range(0, count, chunk_size):
+            size = min(chunk_size, count - start)
+            chunk = chunk_columns(keys, key_ids)
+            for (name, _), column_offset in zip(MacroColumns.COLUMNS, column_offsets):
+                column = getattr(chunk, name)
+                f.seek(column_offset + start * column.itemsize)
+                column.frombytes(f.read(size * column.itemsize))
+                if sys.byteorder == 'big' and column.itemsize > 1:
+                    column.byteswap()
+                if len(column) != size:
+                    raise ValueError("Truncated macro file")
+            yield chunk
+
+def event_count(path):
+    """Return the number of events in a binary macro file, or None for other formats."""
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            return None
+        f.seek(0)
+        return read_header(f)[1]
+
+def is_binary(data):
+    """Return True if ``data`` starts with the binary macro header."""
+    return bytes(data[:len(MAGIC)]) == MAGIC
+
+def loads(data):
+    """Load macro columns from either the binary or the legacy JSON format."""
+    if is_binary(data):
+        return decode(data)
+    return MacroColumns.from_actions(json.loads(data))
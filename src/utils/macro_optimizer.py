@@ -0,0 +1,193 @@
+from utils import macro_codec
+from utils.macro_codec import MacroColumns
+
+# Events closer than this to the previous one are played in the same tick
+MERGE_GAP = 0.001
+
+class OptimizeResult:
+    """What optimizing a macro removed, and the optimized macro if it was built in memory."""
+    REASONS = {
+        'duplicate_moves': "moves to the current position",
+        'moves_before_clicks': "moves before a click at the same spot",
+        'auto_repeat': "auto-repeat key presses",
+        'stray_releases': "releases of keys that were not pressed",
+    }
+
+    def __init__(self, events_before, events_after, duration_before, duration_after, removed,
+                 waits_merged, columns=None):
+        self.events_before = events_before
+        self.events_after = events_after
+        self.duration_before = duration_before
+        self.duration_after = duration_after
+        self.removed = removed
+        self.waits_merged = waits_merged
+        self.columns = columns
+
+    @property
+    def events_removed(self):
+        return self.events_before - self.events_after
+
+    @property
+    def time_saved(self):
+        """Seconds earlier the last replayed operation of the optimized macro happens."""
+        return self.duration_before - self.duration_after
+
+    @property
+    def changed(self):
+        return bool(self.events_removed or self.waits_merged)
+
+    def summary(self):
+        """Describe the optimization for the status panel and dialogs."""
+        if not self.changed:
+            return "Nothing to optimize"
+        lines = []
+        if self.events_removed:
+            percent = self.events_removed / self.events_before * 100
+            line = f"Optimized away {self.events_removed} events ({percent:.1f}%)"
+            if self.time_saved > 0:
+                line += f", {self.time_saved * 1000:.0f} ms shorter"
+            lines.append(line)
+        if self.waits_merged:
+            lines.append(f"Merged {self.waits_merged} waits under {MERGE_GAP * 1000:g} ms")
+        return '\n'.join(lines)
+
+    def stats(self):
+        """Return the result as a dict for the recording report."""
+        return {
+            'events_before': self.events_before,
+            'events_after': self.events_after,
+            'removed': dict(self.removed),
+            'waits_merged': self.waits_merged,
+            'time_saved_ms': self.time_saved * 1000,
+        }
+
+class MacroOptimizer:
+    """Rewrite a macro into a smaller one that replays the same.
+
+    Removes moves that leave the pointer where it is, moves right before a
+    click at the same spot (the click moves the pointer itself), auto-repeat
+    presses of keys that are already held and releases of keys that are not,
+    the same presses and releases PlanCompiler drops. Events less than
+    ``merge_gap`` seconds after the previous one are moved onto its time so
+    they are sent in one scheduler tick.
+
+    The macro can be fed in consecutive blocks; a move at the end of a block
+    is held back until the next block shows whether a click follows it.
+    """
+
+    def __init__(self, merge_gap=MERGE_GAP):
+        self.merge_gap = merge_gap
+        self.removed = {reason: 0 for reason in OptimizeResult.REASONS}
+        self.waits_merged = 0
+        self.events_before = 0
+        self.events_after = 0
+        self.duration_before = 0.0
+        self.duration_after = 0.0
+        self._position = None
+        self._held_keys = set()
+        self._last_time = None
+        self._pending = None
+
+    def feed(self, columns):
+        """Optimize the next block and return the events that are final."""
+        self.events_before += len(columns)
+        if self._pending is not None:
+            # The new block's key table is the most complete
+            merged = columns.slice(0, 0)
+            merged.extend(self._pending)
+            merged.extend(columns)
+            columns = merged
+            self._pending = None
+        count = len(columns)
+        if count and columns.type[count - 1] == macro_codec.MOVE:
+            self._pending = columns.slice(count - 1)
+            count -= 1
+        return self._optimize(columns, count)
+
+    def finish(self):
+        """Return the events held back from the last block."""
+        pending, self._pending = self._pending, None
+        if pending is None:
+            return MacroColumns()
+        return self._optimize(pending, len(pending))
+
+    def _optimize(self, columns, count):
+        times = columns.time
+        types = columns.type
+        xs = columns.x
+        ys = columns.y
+        key_ids = columns.key
+        removed = self.removed
+        held_keys = self._held_keys
+        position = self._position
+        last_time = self._last_time
+        # Times of the last events PlanCompiler replays, before and after
+        duration_before = self.duration_before
+        duration_after = self.duration_after
+
+        kept = []
+        kept_times = []
+        for index in range(count):
+            event_type = types[index]
+            if event_type == macro_codec.MOVE:
+                point = (xs[index], ys[index])
+                if point == position:
+                    removed['duplicate_moves'] += 1
+                    duration_before = times[index]
+                    continue
+                following = index + 1
+                if (following < len(columns) and types[following] == macro_codec.CLICK
+                        and key_ids[following] != macro_codec.NO_KEY
+                        and xs[following] == point[0] and ys[following] == point[1]):
+                    removed['moves_before_clicks'] += 1
+                    continue
+                position = point
+            elif event_type in (macro_codec.CLICK, macro_codec.SCROLL):
+                if event_type == macro_codec.SCROLL or key_ids[index] != macro_codec.NO_KEY:
+                    position = (xs[index], ys[index])
+            elif event_type == macro_codec.KEY_PRESS:
+                if key_ids[index] in held_keys:
+                    removed['auto_repeat'] += 1
+                    continue
+                held_keys.add(key_ids[index])
+            elif event_type == macro_codec.KEY_RELEASE:
+                if key_ids[index] not in held_keys:
+                    removed['stray_releases'] += 1
+                    continue
+                held_keys.discard(key_ids[index])
+
+            time = times[index]
+            if last_time is not None and time != last_time and time - last_time < self.merge_gap:
+                time = last_time
+                self.waits_merged += 1
+            kept.append(index)
+            kept_times.append(time)
+            last_time = time
+            if event_type in (macro_codec.MOVE, macro_codec.SCROLL) or key_ids[index] != macro_codec.NO_KEY:
+                duration_before = times[index]
+                duration_after = time
+
+        self._position = position
+        self._last_time = last_time
+        self.duration_before = duration_before
+        self.duration_after = duration_after
+        result = MacroColumns(columns.keys)
+        for name, _ in MacroColumns.COLUMNS:
+            if name == 'time':
+                result.time.extend(kept_times)
+            else:
+                source = getattr(columns, name)
+                getattr(result, name).extend(source[index] for index in kept)
+        self.events_after += len(result)
+        return result
+
+    def result(self, columns=None):
+        return OptimizeResult(self.events_before, self.events_after, self.duration_before,
+                              self.duration_after, self.removed, self.waits_merged, columns)
+
+def optimize_macro(columns, merge_gap=MERGE_GAP):
+    """Optimize a whole macro; the result holds the optimized columns."""
+    optimizer = MacroOptimizer(merge_gap)
+    optimized = optimizer.feed(columns)
+    optimized.extend(optimizer.finish())
+    return optimizer.result(optimized)
@@ -0,0 +1,139 @@
+from utils import macro_codec
+from utils.macro_codec import MacroColumns
+
+def rdp_keep(xs, ys, tolerance):
+    """Return the indices kept by Ramer-Douglas-Peucker simplification of a path."""
+    count = len(xs)
+    if count < 3 or tolerance <= 0:
+        return list(range(count))
+
+    keep = [False] * count
+    keep[0] = keep[-1] = True
+    tolerance_sq = tolerance * tolerance
+    stack = [(0, count - 1)]
+    while stack:
+        first, last = stack.pop()
+        x1, y1 = xs[first], ys[first]
+        dx, dy = xs[last] - x1, ys[last] - y1
+        length_sq = dx * dx + dy * dy
+
+        max_dist_sq = -1.0
+        index = first
+        for i in range(first + 1, last):
+            px, py = xs[i] - x1, ys[i] - y1
+            if length_sq:
+                cross = px * dy - py * dx
+                dist_sq = cross * cross / length_sq
+            else:
+                dist_sq = px * px + py * py
+            if dist_sq > max_dist_sq:
+                max_dist_sq = dist_sq
+                index = i
+
+        if max_dist_sq > tolerance_sq:
+            keep[index] = True
+            if index - first > 1:
+                stack.append((first, index))
+            if last - index > 1:
+                stack.append((index, last))
+    return [i for i in range(count) if keep[i]]
+
+def simplify_moves(columns, tolerance):
+    """Simplify every run of consecutive move events, leaving other events untouched."""
+    if tolerance <= 0:
+        return columns
+
+    result = MacroColumns(columns.keys)
+    names = [name for name, _ in MacroColumns.COLUMNS]
+    source = [getattr(columns, name) for name in names]
+    target = [getattr(result, name) for name in names]
+
+    def copy(indices):
+        for src, dst in zip(source, target):
+            dst.extend(src[i] for i in indices)
+
+    run_start = None
+    count = len(columns)
+    for index in range(count + 1):
+        is_move = index < count and columns.type[index] == macro_codec.MOVE
+        if is_move:
+            if run_start is None:
+                run_start = index
+            continue
+        if run_start is not None:
+            kept = rdp_keep(columns.x[run_start:index], columns.y[run_start:index], tolerance)
+            copy([run_start + i for i in kept])
+            run_start = None
+        if index < count:
+            copy((index,))
+    return result
+
+def count_moves(columns):
+    return columns.type.count(macro_codec.MOVE)
+
+class MoveSimplifier:
+    """Simplify the moves of a macro that arrives as consecutive blocks.
+
+    The moves at the end of a block may continue in the next one, so they
+    are held back as a list of slices until the run ends; feed() returns
+    the simplified events before them and finish() the rest. A run longer
+    than MAX_RUN moves is simplified and emitted early, keeping only its
+    last point as the start of the rest of the run, so memory stays bounded.
+    """
+    MAX_RUN = 16384
+
+    def __init__(self, tolerance):
+        self.tolerance = tolerance
+        self._run = []
+        self._run_length = 0
+        # Empty columns sharing the key table of the latest block
+        self._empty = MacroColumns()
+
+    def _hold(self, moves):
+        if len(moves):
+            self._run.append(moves)
+            self._run_length += len(moves)
+
+    def _emit_run(self, result, keep_anchor=False):
+        """Simplify the held moves into ``result``, optionally holding back the last one."""
+        if not self._run:
+            return result
+        run = MacroColumns()
+        for moves in self._run:
+            # Moves have no key, so slices of any key table can be joined
+            run.extend(moves)
+        self._run = []
+        self._run_length = 0
+        kept = simplify_moves(run, self.tolerance)
+        if keep_anchor:
+            result.extend(kept.slice(0, len(kept) - 1))
+            self._hold(kept.slice(len(kept) - 1))
+        else:
+            result.extend(kept)
+        return result
+
+    def feed(self, columns):
+        if self.tolerance <= 0:
+            return columns
+        self._empty = columns.slice(0, 0)
+        count = len(columns)
+        start = 0
+        while start < count and columns.type[start] == macro_codec.MOVE:
+            start += 1
+        if start == count:
+            self._hold(columns)
+            if self._run_length <= self.MAX_RUN:
+                return columns.slice(0, 0)
+            return self._emit_run(columns.slice(0, 0), keep_anchor=True)
+
+        end = count
+        while columns.type[end - 1] == macro_codec.MOVE:
+            end -= 1
+        self._hold(columns.slice(0, start))
+        result = self._emit_run(columns.slice(0, 0))
+        result.extend(simplify_moves(columns.slice(start, end), self.tolerance))
+        self._hold(columns.slice(end))
+        return result
+
+    def finish(self):
+        return self._emit_run(self._empty.slice(0, 0))
@@ -0,0 +1,122 @@
+import array
+import threading
+import time
+
+from utils import macro_codec
+from utils.macro_codec import MacroColumns
+
+class RecordingBuffer(MacroColumns):
+    """Typed-array storage for the events captured while recording.
+
+    Timestamps are monotonic nanoseconds since the buffer was created. Each
+    event costs a handful of array appends instead of a dict allocation.
+
+    Mouse moves are coalesced at capture time: a move is only stored when at
+    least ``1 / max_move_rate`` seconds have passed and the cursor travelled
+    ``min_move_distance`` pixels since the last stored move. The latest
+    skipped move is kept pending and stored before the next other event, so
+    the cursor still ends up where it was.
+    """
+    COLUMNS = (('time', 'q'),) + MacroColumns.COLUMNS[1:]
+
+    def __init__(self, clock=time.perf_counter_ns, max_move_rate=0, min_move_distance=0):
+        super().__init__()
+        self.clock = clock
+        self.start_ns = clock()
+        self.min_move_interval_ns = int(1e9 / max_move_rate) if max_move_rate > 0 else 0
+        self.min_move_distance_sq = min_move_distance * min_move_distance
+        self.moves_seen = 0
+        self.moves_stored = 0
+        self._last_move = None
+        self._pending_move = None
+        self._drained_keys = 0
+        # Mouse and keyboard listeners run on separate threads
+        self._lock = threading.Lock()
+
+    def _add(self, event_type, x=0, y=0, dx=0, dy=0, key=macro_codec.NO_KEY, pressed=0):
+        with self._lock:
+            if self._pending_move is not None:
+                self._flush_pending_move()
+            self._append(self.clock() - self.start_ns, event_type, x, y, dx, dy, key, pressed)
+
+    def _append(self, time_ns, event_type, x, y, dx, dy, key, pressed):
+        self.time.append(time_ns)
+        self.type.append(event_type)
+        self.pressed.append(pressed)
+        self.x.append(x)
+        self.y.append(y)
+        self.dx.append(dx)
+        self.dy.append(dy)
+        self.key.append(key)
+
+    def _flush_pending_move(self):
+        time_ns, x, y = self._pending_move
+        self._pending_move = None
+        self._last_move = (time_ns, x, y)
+        self.moves_stored += 1
+        self._append(time_ns, macro_codec.MOVE, x, y, 0, 0, macro_codec.NO_KEY, 0)
+
+    def add_move(self, x, y):
+        x, y = int(x), int(y)
+        with self._lock:
+            self.moves_seen += 1
+            time_ns = self.clock() - self.start_ns
+            last = self._last_move
+            if last is not None:
+                dx, dy = x - last[1], y - last[2]
+                if (time_ns - last[0] < self.min_move_interval_ns
+                        or dx * dx + dy * dy < self.min_move_distance_sq):
+                    self._pending_move = (time_ns, x, y)
+                    return
+            self._pending_move = None
+            self._last_move = (time_ns, x, y)
+            self.moves_stored += 1
+            self._append(time_ns, macro_codec.MOVE, x, y, 0, 0, macro_codec.NO_KEY, 0)
+
+    def add_click(self, x, y, button, pressed):
+        self._add(macro_codec.CLICK, int(x), int(y), key=self.key_id(button), pressed=1 if pressed else 0)
+
+    def add_scroll(self, x, y, dx, dy):
+        self._add(macro_codec.SCROLL, int(x), int(y), int(dx), int(dy))
+
+    def add_key_press(self, key):
+        self._add(macro_codec.KEY_PRESS, key=self.key_id(key))
+
+    def add_key_release(self, key):
+        self._add(macro_codec.KEY_RELEASE, key=self.key_id(key))
+
+    def key_id(self, key):
+        with self._lock:
+            return super().key_id(key)
+
+    def drain(self, final=False):
+        """Take the events recorded so far, leaving the buffer empty.
+
+        Returns (columns, keys interned since the previous drain). The time
+        column of the returned columns keeps nanosecond integers. A pending
+        coalesced move is only flushed when ``final`` is set.
+        """
+        with self._lock:
+            if final and self._pending_move is not None:
+                self._flush_pending_move()
+            batch = MacroColumns()
+            for name, typecode in self.COLUMNS:
+                setattr(batch, name, getattr(self, name))
+                setattr(self, name, array.array(typecode))
+            new_keys = self.keys[self._drained_keys:]
+            self._drained_keys = len(self.keys)
+        return batch, new_keys
+
+    def to_columns(self):
+        """Export the recorded events as macro columns with times in seconds."""
+        with self._lock:
+            if self._pending_move is not None:
+                self._flush_pending_move()
+            columns = MacroColumns(self.keys)
+            columns.time = array.array('d', (t / 1e9 for t in self.time))
+            for name, typecode in MacroColumns.COLUMNS[1:]:
+                setattr(columns, name, array.array(typecode, getattr(self, name)))
+        return columns
+
+    def to_actions(self):
+        return self.to_columns().to_actions()
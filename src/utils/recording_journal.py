@@ -0,0 +1,127 @@
+import array
+import os
+import struct
+import sys
+import threading
+import zlib
+
+from utils.macro_codec import MacroColumns, KEY_LENGTH, column_bytes, chunk_columns
+
+MAGIC = b'TTMJ'
+VERSION = 1
+FILE_HEADER = struct.Struct('<4sH')
+BLOCK_HEADER = struct.Struct('<4sIII')
+BLOCK_TAG = b'BTCH'
+CHECKSUM = struct.Struct('<I')
+
+def encode_block(columns, new_keys):
+    """Encode a batch of buffered events and the keys interned since the last batch."""
+    parts = []
+    for key in new_keys:
+        data = key.encode('utf-8')
+        parts.append(KEY_LENGTH.pack(len(data)))
+        parts.append(data)
+    for name, _ in columns.COLUMNS:
+        parts.append(column_bytes(getattr(columns, name)))
+    payload = b''.join(parts)
+    header = BLOCK_HEADER.pack(BLOCK_TAG, len(columns), len(new_keys), len(payload))
+    return header + payload + CHECKSUM.pack(zlib.crc32(payload))
+
+class RecordingJournal:
+    """Append-only on-disk journal of a recording.
+
+    A background thread periodically drains the recording buffer and appends
+    the batch as one checksummed block, so memory stays flat while recording
+    and a crashed session can be recovered up to the last flushed batch.
+    """
+    FLUSH_INTERVAL = 0.25
+
+    def __init__(self, path, buffer, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.buffer = buffer
+        self.flush_interval = flush_interval
+        self.events_written = 0
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._file = None
+
+    def start(self):
+        self._file = open(self.path, 'wb')
+        self._file.write(FILE_HEADER.pack(MAGIC, VERSION))
+        self._file.flush()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop_event.wait(self.flush_interval):
+            self.flush()
+        self.flush(final=True)
+        self._file.close()
+
+    def flush(self, final=False):
+        """Append everything recorded since the last flush."""
+        columns, new_keys = self.buffer.drain(final)
+        if len(columns) or new_keys:
+            self._file.write(encode_block(columns, new_keys))
+            self._file.flush()
+            self.events_written += len(columns)
+
+    def close(self):
+        """Flush the remaining events and wait for the writer thread to finish."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+
+def iter_journal(path):
+    """Yield the blocks of a journal as macro columns with times in seconds.
+
+    Blocks are read from the file one at a time and share one key table.
+    Reading stops at the first incomplete or corrupt block, which is where a
+    crashed session stopped writing.
+    """
+    with open(path, 'rb') as f:
+        header = f.read(FILE_HEADER.size)
+        if len(header) < FILE_HEADER.size:
+            return
+        magic, version = FILE_HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a TinyTask recording journal")
+
+        key_table = MacroColumns()
+        while True:
+            block_header = f.read(BLOCK_HEADER.size)
+            if len(block_header) < BLOCK_HEADER.size:
+                return
+            tag, count, key_count, length = BLOCK_HEADER.unpack(block_header)
+            if tag != BLOCK_TAG:
+                return
+            payload = f.read(length)
+            checksum = f.read(CHECKSUM.size)
+            if len(payload) != length or len(checksum) != CHECKSUM.size:
+                return
+            if zlib.crc32(payload) != CHECKSUM.unpack(checksum)[0]:
+                return
+
+            position = 0
+            for _ in range(key_count):
+                (key_length,) = KEY_LENGTH.unpack_from(payload, position)
+                position += KEY_LENGTH.size
+                key_table.key_id(payload[position:position + key_length].decode('utf-8'))
+                position += key_length
+            block = chunk_columns(key_table.keys, key_table._key_ids)
+            times = array.array('q')
+            targets = [times] + [getattr(block, name) for name, _ in MacroColumns.COLUMNS[1:]]
+            for column in targets:
+                size = count * column.itemsize
+                column.frombytes(payload[position:position + size])
+                if sys.byteorder == 'big' and column.itemsize > 1:
+                    column.byteswap()
+                position += size
+            block.time = array.array('d', (t / 1e9 for t in times))
+            yield block
+
+def discard_journal(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
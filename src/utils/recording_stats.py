@@ -0,0 +1,110 @@
+import json
+import time
+
+class CallbackStats:
+    """Call count and time spent in one listener callback."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def add(self, elapsed_ns):
+        self.count += 1
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+
+class RecordingStats:
+    """Self-measurement of the recorder's listener callbacks.
+
+    Callbacks wrapped with timed() count their calls and the time spent in
+    them. Events the recorder throws away are counted per reason with
+    filter(). Each reason is only counted from one listener thread, so the
+    counters need no lock.
+    """
+    CALLBACKS = ('on_move', 'on_click', 'on_scroll', 'on_key_press', 'on_key_release')
+
+    def __init__(self, clock=time.perf_counter_ns):
+        self.clock = clock
+        self.callbacks = {name: CallbackStats() for name in self.CALLBACKS}
+        self.filtered = {}
+        self.reset()
+
+    def reset(self):
+        # Wrappers keep references to the callback stats, so reset them in place
+        for stats in self.callbacks.values():
+            stats.reset()
+        self.filtered = {}
+        self.start_ns = self.clock()
+        self.max_backlog = 0
+        self._last_sample = (self.start_ns, {name: 0 for name in self.CALLBACKS})
+
+    def timed(self, name, callback):
+        """Wrap a listener callback so its calls are counted and timed."""
+        stats = self.callbacks[name]
+        clock = self.clock
+
+        def wrapper(*args):
+            start = clock()
+            try:
+                return callback(*args)
+            finally:
+                stats.add(clock() - start)
+        return wrapper
+
+    def filter(self, reason):
+        self.filtered[reason] = self.filtered.get(reason, 0) + 1
+
+    def sample(self, backlog):
+        """Return the callback rates per second since the previous sample."""
+        now = self.clock()
+        if backlog > self.max_backlog:
+            self.max_backlog = backlog
+        last_time, last_counts = self._last_sample
+        counts = {name: stats.count for name, stats in self.callbacks.items()}
+        seconds = (now - last_time) / 1e9
+        self._last_sample = (now, counts)
+        return {name: (counts[name] - last_counts[name]) / seconds if seconds > 0 else 0.0
+                for name in self.CALLBACKS}
+
+    def live_text(self, backlog):
+        """Describe the recorder's load for the status panel."""
+        rates = self.sample(backlog)
+        calls = sum(stats.count for stats in self.callbacks.values())
+        total_ns = sum(stats.total_ns for stats in self.callbacks.values())
+        max_ns = max(stats.max_ns for stats in self.callbacks.values())
+        keys = rates['on_key_press'] + rates['on_key_release']
+        mean_us = total_ns / calls / 1000 if calls else 0.0
+        return (f"Events/s: move {rates['on_move']:.0f}, click {rates['on_click']:.0f}, "
+                f"scroll {rates['on_scroll']:.0f}, key {keys:.0f}\n"
+                f"Callback avg {mean_us:.1f} µs, max {max_ns / 1000:.0f} µs\n"
+                f"Backlog {backlog}, filtered {sum(self.filtered.values())}")
+
+    def report(self, **extra):
+        """Return the statistics of the session as a dict for the session report."""
+        seconds = (self.clock() - self.start_ns) / 1e9
+        callbacks = {}
+        for name, stats in self.callbacks.items():
+            callbacks[name] = {
+                'calls': stats.count,
+                'per_second': stats.count / seconds if seconds > 0 else 0.0,
+                'total_ms': stats.total_ns / 1e6,
+                'mean_us': stats.total_ns / stats.count / 1000 if stats.count else 0.0,
+                'max_us': stats.max_ns / 1000,
+            }
+        report = {
+            'seconds': seconds,
+            'callbacks': callbacks,
+            'filtered': dict(self.filtered),
+            'max_backlog': self.max_backlog,
+        }
+        report.update(extra)
+        return report
+
+def save_report(path, report):
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
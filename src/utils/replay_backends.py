@@ -0,0 +1,295 @@
+import ctypes
+import ctypes.util
+import time
+from abc import ABC, abstractmethod
+
+# pynput is imported where it is used, so the null and XTest backends and
+# the headless player work without it or without a display
+
+def resolve_button(name):
+    """Resolve a recorded button name such as 'Button.left'."""
+    if not name:
+        return None
+    from pynput.mouse import Button
+    return getattr(Button, name.split('.')[-1], None)
+
+def resolve_key(name):
+    """Resolve a recorded key name to something the keyboard controller accepts."""
+    if not name:
+        return None
+    from pynput.keyboard import Key, KeyCode
+    if name.startswith('Key.'):
+        return getattr(Key, name[4:], None)
+    if len(name) == 1:
+        return name
+    if name.startswith('<') and name.endswith('>') and name[1:-1].isdigit():
+        return KeyCode.from_vk(int(name[1:-1]))
+    return None
+
+class ReplayBackend(ABC):
+    """Output device a replay plan is played on.
+
+    Buttons and keys are resolved once when a plan is compiled, the replay
+    then passes the resolved values back to the action methods. ``flush()``
+    is called once per scheduler tick, after all operations due at that
+    instant, so backends can send them to the system as one batch.
+    """
+    name = None
+
+    def resolve_button(self, name):
+        return resolve_button(name)
+
+    def resolve_key(self, name):
+        return resolve_key(name)
+
+    @abstractmethod
+    def move(self, x, y):
+        pass
+
+    @abstractmethod
+    def press_button(self, x, y, button):
+        pass
+
+    @abstractmethod
+    def release_button(self, x, y, button):
+        pass
+
+    @abstractmethod
+    def scroll(self, x, y, dx, dy):
+        pass
+
+    @abstractmethod
+    def press_key(self, key):
+        pass
+
+    @abstractmethod
+    def release_key(self, key):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+class PynputBackend(ReplayBackend):
+    """Replay through pynput controllers, one system call per operation."""
+    name = 'pynput'
+
+    def __init__(self, mouse=None, keyboard=None):
+        from pynput.keyboard import Controller as KeyboardController
+        from pynput.mouse import Controller as MouseController
+        self.mouse = mouse or MouseController()
+        self.keyboard = keyboard or KeyboardController()
+
+    def move(self, x, y):
+        self.mouse.position = (x, y)
+
+    def press_button(self, x, y, button):
+        self.mouse.position = (x, y)
+        self.mouse.press(button)
+
+    def release_button(self, x, y, button):
+        self.mouse.position = (x, y)
+        self.mouse.release(button)
+
+    def scroll(self, x, y, dx, dy):
+        self.mouse.position = (x, y)
+        self.mouse.scroll(dx, dy)
+
+    def press_key(self, key):
+        self.keyboard.press(key)
+
+    def release_key(self, key):
+        self.keyboard.release(key)
+
+class NullBackend(ReplayBackend):
+    """Backend that sends nothing, for dry runs and benchmarks.
+
+    With ``record`` set, every operation is kept in ``events`` as
+    (clock time, operation, arguments...).
+    """
+    name = 'null'
+
+    def __init__(self, record=False, clock=time.perf_counter):
+        self.clock = clock
+        self.calls = 0
+        self.flushes = 0
+        self.events = [] if record else None
+
+    def resolve_button(self, name):
+        return name.split('.')[-1] if name else None
+
+    def resolve_key(self, name):
+        return name or None
+
+    def _call(self, *operation):
+        self.calls += 1
+        if self.events is not None:
+            self.events.append((self.clock(),) + operation)
+
+    def move(self, x, y):
+        self._call('move', x, y)
+
+    def press_button(self, x, y, button):
+        self._call('press_button', x, y, button)
+
+    def release_button(self, x, y, button):
+        self._call('release_button', x, y, button)
+
+    def scroll(self, x, y, dx, dy):
+        self._call('scroll', x, y, dx, dy)
+
+    def press_key(self, key):
+        self._call('press_key', key)
+
+    def release_key(self, key):
+        self._call('release_key', key)
+
+    def flush(self):
+        self.flushes += 1
+
+class XTestBackend(ReplayBackend):
+    """Replay through the X11 XTest extension.
+
+    Fake input events only go into Xlib's output buffer; ``flush()`` sends
+    everything due in the same scheduler tick to the X server at once.
+    Works under Xvfb, so replays can be checked headless.
+    """
+    name = 'xtest'
+    BUTTONS = {'left': 1, 'middle': 2, 'right': 3}
+    # pynput key names whose X keysym name differs
+    KEYSYMS = {
+        'alt': 'Alt_L', 'alt_l': 'Alt_L', 'alt_r': 'Alt_R', 'alt_gr': 'ISO_Level3_Shift',
+        'backspace': 'BackSpace', 'caps_lock': 'Caps_Lock',
+        'cmd': 'Super_L', 'cmd_l': 'Super_L', 'cmd_r': 'Super_R',
+        'ctrl': 'Control_L', 'ctrl_l': 'Control_L', 'ctrl_r': 'Control_R',
+        'delete': 'Delete', 'down': 'Down', 'end': 'End', 'enter': 'Return', 'esc': 'Escape',
+        'home': 'Home', 'insert': 'Insert', 'left': 'Left', 'menu': 'Menu',
+        'num_lock': 'Num_Lock', 'page_down': 'Next', 'page_up': 'Prior', 'pause': 'Pause',
+        'print_screen': 'Print', 'right': 'Right', 'scroll_lock': 'Scroll_Lock',
+        'shift': 'Shift_L', 'shift_l': 'Shift_L', 'shift_r': 'Shift_R',
+        'space': 'space', 'tab': 'Tab', 'up': 'Up',
+    }
+    # X buttons that scroll up, down, left and right
+    SCROLL_UP, SCROLL_DOWN, SCROLL_LEFT, SCROLL_RIGHT = 4, 5, 6, 7
+
+    def __init__(self, display_name=None):
+        x11_path = ctypes.util.find_library('X11')
+        xtst_path = ctypes.util.find_library('Xtst')
+        if not x11_path or not xtst_path:
+            raise OSError("libX11 and libXtst are required for the XTest backend")
+        self.x11 = ctypes.CDLL(x11_path)
+        self.xtst = ctypes.CDLL(xtst_path)
+
+        # The display is used by the cache warm thread to resolve keys and by
+        # the replay thread to send events, so Xlib must lock it
+        self.x11.XInitThreads.restype = ctypes.c_int
+        if not self.x11.XInitThreads():
+            raise OSError("Xlib does not support threads")
+
+        self.x11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        self.x11.XOpenDisplay.restype = ctypes.c_void_p
+        self.x11.XCloseDisplay.argtypes = [ctypes.c_void_p]
+        self.x11.XFlush.argtypes = [ctypes.c_void_p]
+        self.x11.XStringToKeysym.argtypes = [ctypes.c_char_p]
+        self.x11.XStringToKeysym.restype = ctypes.c_ulong
+        self.x11.XKeysymToKeycode.argtypes = [ctypes.c_void_p, ctypes.c_ulong]
+        self.x11.XKeysymToKeycode.restype = ctypes.c_ubyte
+        self.xtst.XTestFakeMotionEvent.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_int,
+                                                   ctypes.c_int, ctypes.c_ulong]
+        self.xtst.XTestFakeButtonEvent.argtypes = [ctypes.c_void_p, ctypes.c_uint, ctypes.c_int,
+                                                   ctypes.c_ulong]
+        self.xtst.XTestFakeKeyEvent.argtypes = [ctypes.c_void_p, ctypes.c_uint, ctypes.c_int,
+                                                ctypes.c_ulong]
+
+        self.display = self.x11.XOpenDisplay(display_name.encode() if display_name else None)
+        if not self.display:
+            raise OSError("Cannot open the X display")
+
+    def resolve_button(self, name):
+        if not name:
+            return None
+        name = name.split('.')[-1]
+        if name in self.BUTTONS:
+            return self.BUTTONS[name]
+        if name.startswith('button') and name[6:].isdigit():
+            return int(name[6:])
+        return None
+
+    def resolve_key(self, name):
+        """Resolve a recorded key name to an X keycode."""
+        if not name:
+            return None
+        if name.startswith('Key.'):
+            key = name[4:]
+            if key in self.KEYSYMS:
+                key = self.KEYSYMS[key]
+            elif key[:1] == 'f' and key[1:].isdigit():
+                key = 'F' + key[1:]
+            keysym = self.x11.XStringToKeysym(key.encode())
+        elif len(name) == 1:
+            # Latin-1 keysyms equal their code point, other characters use the Unicode range
+            code = ord(name)
+            keysym = code if code < 0x100 else 0x01000000 | code
+        elif name.startswith('<') and name.endswith('>') and name[1:-1].isdigit():
+            # pynput reports X keysyms as virtual key codes
+            keysym = int(name[1:-1])
+        else:
+            return None
+        if not keysym:
+            return None
+        return self.x11.XKeysymToKeycode(self.display, keysym) or None
+
+    def move(self, x, y):
+        self.xtst.XTestFakeMotionEvent(self.display, -1, x, y, 0)
+
+    def press_button(self, x, y, button):
+        self.move(x, y)
+        self.xtst.XTestFakeButtonEvent(self.display, button, 1, 0)
+
+    def release_button(self, x, y, button):
+        self.move(x, y)
+        self.xtst.XTestFakeButtonEvent(self.display, button, 0, 0)
+
+    def scroll(self, x, y, dx, dy):
+        self.move(x, y)
+        for button, steps in ((self.SCROLL_UP, dy), (self.SCROLL_DOWN, -dy),
+                              (self.SCROLL_RIGHT, dx), (self.SCROLL_LEFT, -dx)):
+            for _ in range(max(0, steps)):
+                self.xtst.XTestFakeButtonEvent(self.display, button, 1, 0)
+                self.xtst.XTestFakeButtonEvent(self.display, button, 0, 0)
+
+    def press_key(self, key):
+        self.xtst.XTestFakeKeyEvent(self.display, key, 1, 0)
+
+    def release_key(self, key):
+        self.xtst.XTestFakeKeyEvent(self.display, key, 0, 0)
+
+    def flush(self):
+        self.x11.XFlush(self.display)
+
+    def close(self):
+        if self.display:
+            self.x11.XCloseDisplay(self.display)
+            self.display = None
+
+BACKENDS = {
+    'pynput': PynputBackend,
+    'xtest': XTestBackend,
+    'null': NullBackend,
+}
+
+# Backends offered in the settings dialog
+BACKEND_CHOICES = (
+    ('pynput', "System (pynput)"),
+    ('xtest', "X11 XTest (batched)"),
+)
+
+def create_backend(name):
+    """Create the named backend, falling back to pynput if it is not available."""
+    try:
+        return BACKENDS[name]()
+    except (KeyError, OSError) as e:
+        print(f"Error creating replay backend '{name}': {str(e)}")
+        return PynputBackend()
@@ -0,0 +1,123 @@
+import threading
+import time
+
+from utils.replay_plan import (OP_MOVE, OP_PRESS_BUTTON, OP_RELEASE_BUTTON, OP_SCROLL,
+                               OP_PRESS_KEY, OP_RELEASE_KEY)
+from utils.scheduler import DeadlineScheduler
+from utils.replay_timing import ReplayTiming
+
+class ReplayEngine:
+    """Play compiled plans on a replay backend.
+
+    Every operation already due when the scheduler wakes up forms one tick;
+    the backend is flushed once per tick instead of once per operation.
+    """
+    # Shortest time between the starts of repeated iterations, so a plan
+    # that takes no time does not spin the replay thread
+    MIN_ITERATION = 0.01
+
+    def __init__(self, backend, timing=None):
+        self.backend = backend
+        self.timing = timing or ReplayTiming()
+        self.pressed_keys = set()
+        self.stop_event = threading.Event()
+        self.scheduler = DeadlineScheduler(stop_event=self.stop_event)
+
+    def stop(self):
+        """Ask a running replay to stop as soon as possible."""
+        self.stop_event.set()
+
+    @property
+    def stopped(self):
+        return self.stop_event.is_set()
+
+    def run(self, plan, count=1, duration=None, on_iteration=None):
+        """Play ``plan`` repeatedly in this thread.
+
+        ``count`` is the number of iterations (0 repeats until stopped) and
+        ``duration`` limits, in seconds, how long new iterations are started.
+        ``on_iteration(index, seconds)`` is called after every iteration.
+        Returns the number of completed iterations.
+        """
+        if not len(plan):
+            return 0
+        self.scheduler.reset_stats()
+        started = time.perf_counter()
+        iteration = 0
+        while not self.stopped:
+            iteration_start = time.perf_counter()
+            if not self.play(plan):
+                break
+            iteration += 1
+            now = time.perf_counter()
+            if on_iteration:
+                on_iteration(iteration, now - iteration_start)
+            if count and iteration >= count:
+                break
+            if duration is not None and now - started >= duration:
+                break
+            idle = self.MIN_ITERATION - (now - iteration_start)
+            if idle > 0 and self.stop_event.wait(idle):
+                break
+        return iteration
+
+    def play(self, plan):
+        """Play ``plan`` once. Returns False if the replay was stopped."""
+        backend = self.backend
+        flush = backend.flush
+        pressed_keys = self.pressed_keys
+        stop_event = self.stop_event
+        wait_until = self.scheduler.wait_until
+        record = self.timing.record
+        clock = self.scheduler.clock
+        self.timing.start_iteration()
+        self.scheduler.start()
+        start_time = self.scheduler.start_time
+        # Elapsed time of the last wake-up, operations due by then join its tick
+        due = None
+        
+        try:
+            for deadline, op, x, y, arg in plan:
+                if due is None or deadline > due:
+                    # Send the previous tick as one batch before waiting for the next
+                    flush()
+                    wait_until(deadline)
+                    due = clock() - start_time
+                if stop_event.is_set():
+                    return False
+                
+                dispatched = clock()
+                if op == OP_MOVE:
+                    backend.move(x, y)
+                elif op == OP_PRESS_BUTTON:
+                    backend.press_button(x, y, arg)
+                elif op == OP_RELEASE_BUTTON:
+                    backend.release_button(x, y, arg)
+                elif op == OP_PRESS_KEY:
+                    try:
+                        backend.press_key(arg)
+                        pressed_keys.add(arg)
+                    except:
+                        pass
+                elif op == OP_RELEASE_KEY:
+                    try:
+                        backend.release_key(arg)
+                        pressed_keys.discard(arg)
+                    except:
+                        pass
+                elif op == OP_SCROLL:
+                    backend.scroll(x, y, *arg)
+                record(op, deadline, dispatched - start_time, clock() - dispatched)
+        finally:
+            self.release_all()
+        return True
+
+    def release_all(self):
+        """Release every key still held by the replay."""
+        for key in list(self.pressed_keys):
+            try:
+                self.backend.release_key(key)
+            except:
+                pass
+        self.pressed_keys.clear()
+        self.backend.flush()
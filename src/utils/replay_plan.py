@@ -0,0 +1,216 @@
+import array
+import queue
+import threading
+
+from utils import macro_codec
+from utils.replay_backends import resolve_button, resolve_key
+
+# Operation codes of a compiled plan
+OP_MOVE = 0
+OP_PRESS_BUTTON = 1
+OP_RELEASE_BUTTON = 2
+OP_SCROLL = 3
+OP_PRESS_KEY = 4
+OP_RELEASE_KEY = 5
+
+class ReplayPlan:
+    """Pre-resolved replay operations stored as parallel columns."""
+
+    def __init__(self):
+        self.times = array.array('d')
+        self.ops = array.array('B')
+        self.xs = array.array('i')
+        self.ys = array.array('i')
+        self.args = []
+
+    def __len__(self):
+        return len(self.ops)
+
+    @property
+    def duration(self):
+        return self.times[-1] if self.times else 0.0
+
+    def append(self, time, op, x=0, y=0, arg=None):
+        self.times.append(time)
+        self.ops.append(op)
+        self.xs.append(x)
+        self.ys.append(y)
+        self.args.append(arg)
+
+    def extend(self, other):
+        self.times.extend(other.times)
+        self.ops.extend(other.ops)
+        self.xs.extend(other.xs)
+        self.ys.extend(other.ys)
+        self.args.extend(other.args)
+
+    def __iter__(self):
+        return zip(self.times, self.ops, self.xs, self.ys, self.args)
+
+    def warped(self, warp):
+        """Return a plan sharing this plan's operations on a warped timeline."""
+        plan = ReplayPlan()
+        plan.times = warp.apply(self.times)
+        plan.ops = self.ops
+        plan.xs = self.xs
+        plan.ys = self.ys
+        plan.args = self.args
+        return plan
+
+class TimeWarp:
+    """Speed up a timeline and compress idle gaps longer than ``idle_cap`` seconds.
+
+    Like the compiler it keeps its position between calls, so a timeline can
+    be warped chunk by chunk.
+    """
+
+    def __init__(self, speed=1.0, idle_cap=0.0):
+        self.speed = speed if speed > 0 else 1.0
+        self.idle_cap = idle_cap
+        self.source_time = 0.0
+        self.target_time = 0.0
+
+    @property
+    def is_identity(self):
+        return self.speed == 1.0 and not self.idle_cap
+
+    def apply(self, times):
+        result = array.array('d')
+        speed = self.speed
+        idle_cap = self.idle_cap
+        source_time = self.source_time
+        target_time = self.target_time
+        for time in times:
+            gap = (time - source_time) / speed
+            if idle_cap and gap > idle_cap:
+                gap = idle_cap
+            if gap > 0:
+                target_time += gap
+            source_time = time
+            result.append(target_time)
+        self.source_time = source_time
+        self.target_time = target_time
+        return result
+
+class PlanCompiler:
+    """Compile macro columns into replay plans.
+
+    The compiler is incremental: it keeps the set of held keys between calls
+    so a macro can be compiled chunk by chunk. Buttons and keys are resolved
+    for ``backend``, or for pynput controllers if no backend is given.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend
+        self.held_keys = set()
+        self._key_table = None
+
+    def _resolve_keys(self, key_table):
+        # Chunks of one file share their key table, resolve it only once
+        if key_table is not self._key_table:
+            self._key_table = key_table
+            backend = self.backend
+            self._buttons = [backend.resolve_button(key) if backend else resolve_button(key)
+                             for key in key_table]
+            self._keys = [backend.resolve_key(key) if backend else resolve_key(key)
+                          for key in key_table]
+        return self._buttons, self._keys
+
+    def compile(self, columns):
+        plan = ReplayPlan()
+        buttons, keys = self._resolve_keys(columns.keys)
+        held_keys = self.held_keys
+
+        for time, event_type, pressed, x, y, dx, dy, key_id in zip(
+                columns.time, columns.type, columns.pressed, columns.x, columns.y,
+                columns.dx, columns.dy, columns.key):
+            if event_type == macro_codec.MOVE:
+                plan.append(time, OP_MOVE, x, y)
+            elif event_type == macro_codec.CLICK:
+                button = buttons[key_id] if key_id != macro_codec.NO_KEY else None
+                if button is not None:
+                    plan.append(time, OP_PRESS_BUTTON if pressed else OP_RELEASE_BUTTON, x, y, button)
+            elif event_type == macro_codec.SCROLL:
+                plan.append(time, OP_SCROLL, x, y, (dx, dy))
+            elif key_id != macro_codec.NO_KEY:
+                key = keys[key_id]
+                if key is None:
+                    continue
+                # Auto-repeat presses and stray releases are dropped here once
+                # instead of being filtered during playback
+                name = columns.keys[key_id]
+                if event_type == macro_codec.KEY_PRESS and name not in held_keys:
+                    held_keys.add(name)
+                    plan.append(time, OP_PRESS_KEY, arg=key)
+                elif event_type == macro_codec.KEY_RELEASE and name in held_keys:
+                    held_keys.discard(name)
+                    plan.append(time, OP_RELEASE_KEY, arg=key)
+        return plan
+
+class PlanStream:
+    """Replay operations decoded from a macro file while it is being played.
+
+    A background thread reads the file chunk by chunk, compiles and warps
+    each chunk and hands it over through a bounded queue, so playback starts
+    after the first chunk and memory stays flat however long the macro is.
+    Iterating the stream again decodes the file again.
+    """
+    CHUNK_SIZE = 4096
+    PREFETCH_CHUNKS = 4
+
+    def __init__(self, path, speed=1.0, idle_cap=0.0, backend=None, chunk_size=CHUNK_SIZE,
+                 prefetch_chunks=PREFETCH_CHUNKS):
+        self.path = path
+        self.speed = speed
+        self.idle_cap = idle_cap
+        self.backend = backend
+        self.chunk_size = chunk_size
+        self.prefetch_chunks = prefetch_chunks
+        self.events = macro_codec.event_count(path) or 0
+
+    def __len__(self):
+        return self.events
+
+    def _decode(self, chunks, stop_event):
+        compiler = PlanCompiler(self.backend)
+        warp = TimeWarp(self.speed, self.idle_cap)
+
+        def put(item):
+            while not stop_event.is_set():
+                try:
+                    chunks.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        try:
+            for columns in macro_codec.iter_chunks(self.path, self.chunk_size):
+                plan = compiler.compile(columns)
+                if not warp.is_identity:
+                    plan = plan.warped(warp)
+                if not put(plan):
+                    return
+            put(None)
+        except Exception as e:
+            put(e)
+
+    def __iter__(self):
+        chunks = queue.Queue(maxsize=self.prefetch_chunks)
+        stop_event = threading.Event()
+        decoder = threading.Thread(target=self._decode, args=(chunks, stop_event), daemon=True)
+        decoder.start()
+        try:
+            while True:
+                plan = chunks.get()
+                if plan is None:
+                    return
+                if isinstance(plan, Exception):
+                    raise plan
+                yield from plan
+        finally:
+            stop_event.set()
+
+def compile_plan(columns, backend=None):
+    """Compile a whole macro into a replay plan for ``backend``."""
+    return PlanCompiler(backend).compile(columns)
@@ -1,76 +1,31 @@
 from PyQt6.QtCore import QThread, pyqtSignal
-from pynput.mouse import Button
-from pynput.keyboard import Key
-import time
+
+from utils.replay_engine import ReplayEngine
+from utils.replay_timing import ReplayTiming
 
 class ReplayThread(QThread):
     status_update = pyqtSignal(str)
+    iteration_finished = pyqtSignal(int, float)
     
-    def __init__(self, actions, mouse, keyboard):
+    def __init__(self, plan, backend, count=1, duration=None, timing_file=None):
         super().__init__()
-        self.actions = actions
-        self.mouse = mouse
-        self.keyboard = keyboard
-        self.pressed_keys = set()
+        self.plan = plan
+        self.count = count
+        self.duration = duration
+        self.timing_file = timing_file
+        self.timing = ReplayTiming(keep_events=timing_file is not None)
+        self.engine = ReplayEngine(backend, self.timing)
+        self.scheduler = self.engine.scheduler
+    
+    def stop(self):
+        self.engine.stop()
     
     def run(self):
         self.status_update.emit("Playing...")
-        last_time = 0
-        
-        for action in self.actions:
-            time_diff = action['time'] - last_time
-            if time_diff > 0:
-                time.sleep(time_diff)
-            
-            if action['type'] == 'move':
-                self.mouse.position = (action['x'], action['y'])
-            elif action['type'] == 'click':
-                self.mouse.position = (action['x'], action['y'])
-                button = eval(f"Button.{action['button'].split('.')[-1]}")
-                if action['pressed']:
-                    self.mouse.press(button)
-                else:
-                    self.mouse.release(button)
-            elif action['type'] == 'key_press':
-                try:
-                    key_str = action['key']
-                    if key_str not in self.pressed_keys:
-                        if key_str.startswith('Key.'):
-                            key = eval(f"Key.{key_str.split('.')[-1]}")
-                            self.keyboard.press(key)
-                        else:
-                            self.keyboard.press(key_str)
-                        self.pressed_keys.add(key_str)
-                except:
-                    pass
-            elif action['type'] == 'key_release':
-                try:
-                    key_str = action['key']
-                    if key_str in self.pressed_keys:
-                        if key_str.startswith('Key.'):
-                            key = eval(f"Key.{key_str.split('.')[-1]}")
-                            self.keyboard.release(key)
-                        else:
-                            self.keyboard.release(key_str)
-                        self.pressed_keys.remove(key_str)
-                except:
-                    pass
-            elif action['type'] == 'scroll':
-                self.mouse.position = (action['x'], action['y'])
-                self.mouse.scroll(action['dx'], action['dy'])
-            
-            last_time = action['time']
-        
-        # Release all pressed keys
-        for key_str in list(self.pressed_keys):
+        self.engine.run(self.plan, self.count, self.duration, self.iteration_finished.emit)
+        if self.timing_file:
             try:
-                if key_str.startswith('Key.'):
-                    key = eval(f"Key.{key_str.split('.')[-1]}")
-                    self.keyboard.release(key)
-                else:
-                    self.keyboard.release(key_str)
-            except:
-                pass
-        self.pressed_keys.clear()
-        
-        self.status_update.emit("Ready\nPress 'R' to record") 
\ No newline at end of file
+                self.timing.dump(self.timing_file)
+            except OSError as e:
+                print(f"Error saving replay timing: {str(e)}")
+        self.status_update.emit("Ready\nPress 'R' to record")
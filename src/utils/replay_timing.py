@@ -0,0 +1,121 @@
+import array
+import json
+from bisect import bisect_left
+
+class LatencyHistogram:
+    """Histogram of durations in seconds with logarithmic buckets.
+
+    Buckets span 1 µs to 10 s with BUCKETS_PER_DECADE buckets per factor of
+    ten, so adding a value costs one bisect however many values were added
+    and percentiles are accurate to about 12%.
+    """
+    BUCKETS_PER_DECADE = 20
+    MIN_VALUE = 1e-6
+    DECADES = 7
+
+    def __init__(self):
+        steps = self.BUCKETS_PER_DECADE * self.DECADES
+        self.edges = [self.MIN_VALUE * 10 ** (step / self.BUCKETS_PER_DECADE) for step in range(steps + 1)]
+        self.counts = [0] * (len(self.edges) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        self.counts[bisect_left(self.edges, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percent):
+        """Return the upper bound of the bucket holding the given percentile."""
+        if not self.count:
+            return 0.0
+        rank = self.count * percent / 100
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                if index >= len(self.edges):
+                    return self.max
+                return min(self.edges[index], self.max)
+        return self.max
+
+    def buckets(self):
+        """Return (upper bound in seconds, count) of the non-empty buckets."""
+        return [(self.edges[index] if index < len(self.edges) else None, count)
+                for index, count in enumerate(self.counts) if count]
+
+class ReplayTiming:
+    """Per-operation timing of a replay.
+
+    For each dispatched operation the lateness (actual minus scheduled
+    dispatch time) and the duration of the backend call go into histograms
+    that cover the whole replay. With ``keep_events`` the individual timings
+    of the latest iteration are kept as well, for dump().
+    """
+
+    def __init__(self, keep_events=False):
+        self.keep_events = keep_events
+        self.lateness = LatencyHistogram()
+        self.call_duration = LatencyHistogram()
+        self.drift = 0.0
+        self.start_iteration()
+
+    def start_iteration(self):
+        self.ops = array.array('B')
+        self.scheduled = array.array('d')
+        self.actual = array.array('d')
+        self.durations = array.array('d')
+
+    def record(self, op, scheduled, actual, duration):
+        """Record one operation; times are seconds since the start of the iteration."""
+        lateness = actual - scheduled
+        self.lateness.add(lateness if lateness > 0 else 0.0)
+        self.call_duration.add(duration)
+        self.drift = lateness
+        if self.keep_events:
+            self.ops.append(op)
+            self.scheduled.append(scheduled)
+            self.actual.append(actual)
+            self.durations.append(duration)
+
+    def summary(self):
+        """Describe the replay timing for the status panel."""
+        if not self.lateness.count:
+            return ""
+        lateness = self.lateness
+        return (f"Late: p50 {lateness.percentile(50) * 1000:.2f} ms, "
+                f"p99 {lateness.percentile(99) * 1000:.2f} ms, max {lateness.max * 1000:.2f} ms\n"
+                f"Drift: {self.drift * 1000:.2f} ms, "
+                f"calls avg {self.call_duration.mean * 1000:.3f} ms")
+
+    def stats(self):
+        result = {'events': self.lateness.count, 'drift_ms': self.drift * 1000}
+        for name, histogram in (('lateness', self.lateness), ('call', self.call_duration)):
+            result[name] = {
+                'mean_ms': histogram.mean * 1000,
+                'p50_ms': histogram.percentile(50) * 1000,
+                'p99_ms': histogram.percentile(99) * 1000,
+                'max_ms': histogram.max * 1000,
+                'histogram': [[bound * 1000 if bound is not None else None, count]
+                              for bound, count in histogram.buckets()],
+            }
+        return result
+
+    def dump(self, path):
+        """Write the statistics and the per-operation timings of the latest iteration as JSON."""
+        data = self.stats()
+        data['operations'] = {
+            'op': list(self.ops),
+            'scheduled': list(self.scheduled),
+            'actual': list(self.actual),
+            'call_duration': list(self.durations),
+        }
+        with open(path, 'w') as f:
+            json.dump(data, f)
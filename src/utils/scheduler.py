@@ -0,0 +1,66 @@
+import time
+
+class DeadlineScheduler:
+    """Wait for absolute deadlines measured from a fixed start on a monotonic clock.
+
+    Every deadline is relative to the same start instant, so sleep overshoot
+    and the cost of dispatching an event never accumulate across a macro.
+    """
+    SPIN_THRESHOLD = 0.001
+
+    def __init__(self, clock=time.perf_counter, spin_threshold=SPIN_THRESHOLD, stop_event=None):
+        self.clock = clock
+        self.spin_threshold = spin_threshold
+        self.stop_event = stop_event
+        self.start_time = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.events = 0
+        self.total_lateness = 0.0
+        self.max_lateness = 0.0
+        self.last_lateness = 0.0
+
+    def start(self, offset=0.0):
+        """Start the timeline so that ``offset`` seconds are already elapsed.
+
+        The statistics keep accumulating across restarts until reset_stats().
+        """
+        self.start_time = self.clock() - offset
+
+    def elapsed(self):
+        return self.clock() - self.start_time
+
+    def wait_until(self, deadline):
+        """Block until ``deadline`` seconds after start and return the lateness.
+
+        Returns None without waiting further if the stop event gets set.
+        """
+        clock = self.clock
+        target = self.start_time + deadline
+        remaining = target - clock()
+        if remaining > self.spin_threshold:
+            if self.stop_event is None:
+                time.sleep(remaining - self.spin_threshold)
+            elif self.stop_event.wait(remaining - self.spin_threshold):
+                return None
+        # Spin for the final stretch, sleep() cannot hit it precisely
+        now = clock()
+        while now < target:
+            now = clock()
+
+        lateness = now - target
+        self.events += 1
+        self.total_lateness += lateness
+        self.last_lateness = lateness
+        if lateness > self.max_lateness:
+            self.max_lateness = lateness
+        return lateness
+
+    def summary(self):
+        """Describe the timing accuracy of the events waited for so far."""
+        if not self.events:
+            return ""
+        mean = self.total_lateness / self.events
+        return (f"Jitter: avg {mean * 1000:.2f} ms, max {self.max_lateness * 1000:.2f} ms\n"
+                f"Drift: {self.last_lateness * 1000:.2f} ms")
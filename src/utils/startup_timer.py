@@ -0,0 +1,51 @@
+import os
+import sys
+import time
+
+class StartupTimer:
+    """Record how long each startup step takes, to track time-to-window.
+
+    The report is only printed when the app is started with
+    ``--startup-report`` or the TINYTASK_STARTUP_REPORT environment variable.
+    With TINYTASK_STARTUP_REPORT=exit the app quits after the report, so
+    launch times can be compared from a script. The report goes to stderr,
+    or to the file named by TINYTASK_STARTUP_REPORT_FILE; windowed Windows
+    builds have no stderr.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.start = clock()
+        self.marks = []
+        self.enabled = '--startup-report' in sys.argv or bool(os.environ.get('TINYTASK_STARTUP_REPORT'))
+        self.exit_after_report = os.environ.get('TINYTASK_STARTUP_REPORT') == 'exit'
+        self.report_file = os.environ.get('TINYTASK_STARTUP_REPORT_FILE')
+        self.reported = False
+
+    def mark(self, step):
+        """Note that ``step`` just finished."""
+        self.marks.append((step, self.clock()))
+
+    def steps(self):
+        """Return (step, milliseconds spent in it, milliseconds since start) for every mark."""
+        result = []
+        previous = self.start
+        for step, at in self.marks:
+            result.append((step, (at - previous) * 1000, (at - self.start) * 1000))
+            previous = at
+        return result
+
+    def report(self):
+        """Print the startup steps once, if the report is enabled."""
+        if not self.enabled or self.reported:
+            return
+        self.reported = True
+        lines = [f"startup: {total:8.1f} ms  (+{spent:6.1f} ms)  {step}"
+                 for step, spent, total in self.steps()]
+        if self.report_file:
+            with open(self.report_file, 'w') as f:
+                f.write('\n'.join(lines) + '\n')
+        elif sys.stderr is not None:
+            print('\n'.join(lines), file=sys.stderr)
+
+startup_timer = StartupTimer()
@@ -0,0 +1,112 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from utils import macro_codec
+from utils.macro_codec import MacroColumns, ChunkWriter
+
+# Around the chunk size of version 2 files
+SIZES = (0, 1, 4095, 4096, 4097)
+INT32_MIN = -2 ** 31
+INT32_MAX = 2 ** 31 - 1
+
+def make_columns(count):
+    """Return ``count`` events of every type with times in whole nanoseconds."""
+    columns = MacroColumns()
+    for index in range(count):
+        time = index * 1000003 / 1e9
+        kind = index % 5
+        if kind == 0:
+            columns.append(macro_codec.MOVE, time, index % 1920, (index * 7) % 1080)
+        elif kind == 1:
+            columns.append(macro_codec.CLICK, time, 10, 20, key=columns.key_id('Button.left'),
+                           pressed=index % 2)
+        elif kind == 2:
+            columns.append(macro_codec.SCROLL, time, 30, 40, 0, -1 if index % 2 else 1)
+        else:
+            event_type = macro_codec.KEY_PRESS if kind == 3 else macro_codec.KEY_RELEASE
+            columns.append(event_type, time, key=columns.key_id(f"k{index % 7}"))
+    return columns
+
+def assert_same(columns, expected):
+    assert columns.keys == expected.keys
+    for name, _ in MacroColumns.COLUMNS:
+        assert getattr(columns, name) == getattr(expected, name), name
+
+def write_blocks(path, columns, block_size):
+    writer = ChunkWriter(path)
+    for start in range(0, len(columns), block_size):
+        writer.write(columns.slice(start, start + block_size))
+    writer.close()
+
+@pytest.mark.parametrize('version', macro_codec.VERSIONS)
+@pytest.mark.parametrize('count', SIZES)
+def test_round_trip(version, count):
+    columns = make_columns(count)
+    assert_same(macro_codec.decode(macro_codec.encode(columns, version)), columns)
+
+@pytest.mark.parametrize('count', SIZES)
+def test_chunk_writer_matches_encode(tmp_path, count):
+    columns = make_columns(count)
+    path = tmp_path / 'macro.ttm'
+    write_blocks(path, columns, 1000)
+    data = path.read_bytes()
+    assert data == macro_codec.encode(columns)
+    assert_same(macro_codec.decode(data), columns)
+    assert macro_codec.event_count(path) == count
+
+@pytest.mark.parametrize('count', SIZES)
+def test_iter_chunks(tmp_path, count):
+    columns = make_columns(count)
+    path = tmp_path / 'macro.ttm'
+    path.write_bytes(macro_codec.encode(columns))
+    result = MacroColumns(columns.keys)
+    for chunk in macro_codec.iter_chunks(path, 1000):
+        assert len(chunk) <= 1000
+        result.extend(chunk)
+    assert_same(result, columns)
+
+@pytest.mark.parametrize('version', macro_codec.VERSIONS)
+def test_int32_extremes(version):
+    columns = MacroColumns()
+    for index, value in enumerate((INT32_MIN, INT32_MAX, 0, INT32_MAX, INT32_MIN)):
+        columns.append(macro_codec.SCROLL, index / 1e9, value, -value - 1, value, -value - 1)
+    assert_same(macro_codec.decode(macro_codec.encode(columns, version)), columns)
+
+@pytest.mark.parametrize('version', macro_codec.VERSIONS)
+@pytest.mark.parametrize('count', (1, 4097))
+def test_truncated(version, count):
+    data = macro_codec.encode(make_columns(count), version)
+    with pytest.raises(ValueError):
+        macro_codec.decode(data[:-1])
+    with pytest.raises(ValueError):
+        macro_codec.decode(data[:len(data) // 2])
+
+@pytest.mark.parametrize('version', macro_codec.VERSIONS)
+@pytest.mark.parametrize('count', (0, 1, 4097))
+def test_trailing_data(version, count):
+    data = macro_codec.encode(make_columns(count), version)
+    with pytest.raises(ValueError, match="Trailing data"):
+        macro_codec.decode(data + b'\0')
+
+def test_truncated_file(tmp_path):
+    data = macro_codec.encode(make_columns(3))
+    tables = macro_codec.HEADER.size + macro_codec.KEY_LENGTH.size + len('Button.left')
+    path = tmp_path / 'macro.ttm'
+    # Cut inside the header, the key table, the chunk table and the chunk data
+    for size in (macro_codec.HEADER.size - 1, tables - 1, tables + 2, len(data) - 1):
+        path.write_bytes(data[:size])
+        with pytest.raises(ValueError):
+            list(macro_codec.iter_chunks(path))
+        if size < tables:
+            with pytest.raises(ValueError):
+                macro_codec.event_count(path)
+
+def test_corrupt_chunk():
+    data = bytearray(macro_codec.encode(make_columns(3)))
+    data[-4:] = b'\xff' * 4
+    with pytest.raises(ValueError):
+        macro_codec.decode(bytes(data))
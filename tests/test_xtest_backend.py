@@ -0,0 +1,50 @@
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from utils.replay_backends import XTestBackend
+
+# Run under Xvfb, e.g. xvfb-run python -m pytest tests
+pytestmark = pytest.mark.skipif(not os.environ.get('DISPLAY'), reason="needs an X display")
+
+@pytest.fixture
+def backend():
+    try:
+        backend = XTestBackend()
+    except OSError as e:
+        pytest.skip(str(e))
+    yield backend
+    backend.close()
+
+def test_resolve(backend):
+    assert backend.resolve_button('Button.left') == 1
+    assert backend.resolve_button('Button.button8') == 8
+    assert backend.resolve_key('a')
+    assert backend.resolve_key('Key.enter')
+    assert backend.resolve_key('Key.no_such_key') is None
+
+def test_resolve_while_replaying(backend):
+    """Keys resolved by the warm thread share the display with the replay thread."""
+    keycode = backend.resolve_key('a')
+    errors = []
+
+    def resolve():
+        try:
+            for _ in range(2000):
+                assert backend.resolve_key('a') == keycode
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=resolve)
+    thread.start()
+    for index in range(2000):
+        backend.move(index % 100, index % 100)
+        if index % 50 == 0:
+            backend.flush()
+    thread.join()
+    backend.flush()
+    assert not errors